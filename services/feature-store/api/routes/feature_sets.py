@@ -3,15 +3,16 @@ Feature Set management API endpoints
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from storage.feature_storage import FeatureStorage
 
 from core.database import get_db
+from core.metadata_cache import metadata_cache
 from models.feature_set import FeatureSet, FeatureSetStatus
 
 logger = logging.getLogger(__name__)
@@ -211,6 +212,7 @@ async def update_feature_set(
 
     db.commit()
     db.refresh(feature_set)
+    metadata_cache.invalidate(feature_set_id=feature_set.id, name=feature_set.name)
 
     logger.info(f"Updated feature set: {feature_set.name}")
 
@@ -241,6 +243,7 @@ async def delete_feature_set(
     feature_set_name = feature_set.name
     db.delete(feature_set)
     db.commit()
+    metadata_cache.invalidate(feature_set_id=feature_set_id, name=feature_set_name)
 
     logger.info(f"Deleted feature set: {feature_set_name}")
 
@@ -275,7 +278,9 @@ async def activate_feature_set(
         )
 
     feature_set.status = FeatureSetStatus.ACTIVE
+    feature_set.version = (feature_set.version or 1) + 1
     db.commit()
+    metadata_cache.invalidate(feature_set_id=feature_set.id, name=feature_set.name)
 
     logger.info(f"Activated feature set: {feature_set.name}")
 
@@ -286,15 +291,27 @@ async def activate_feature_set(
     }
 
 
+def get_storage(request: Request) -> FeatureStorage:
+    """Get the application's feature storage"""
+    return request.app.state.storage
+
+
 @router.post("/{feature_set_id}/materialize")
 async def materialize_feature_set(
     feature_set_id: str,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     db: Session = Depends(get_db),
-    storage: FeatureStorage = Depends(lambda: FeatureStorage()),
+    storage: FeatureStorage = Depends(get_storage),
 ) -> Dict:
-    """Trigger materialization for a feature set"""
+    """
+    Materialize a feature set
+
+    Without a start date only source rows newer than the feature set's
+    materialization watermark are processed; retrying a failed run is safe.
+    With a start date the window [start_date, end_date) is appended as a
+    backfill; it must end by the feature set's materialization_start_date.
+    """
 
     feature_set = db.query(FeatureSet).filter(FeatureSet.id == feature_set_id).first()
 
@@ -316,24 +333,64 @@ async def materialize_feature_set(
             detail="Materialization is not enabled for this feature set",
         )
 
-    # Use default dates if not provided
+    # Use default end date if not provided
     if not end_date:
         end_date = datetime.utcnow()
-    if not start_date:
-        start_date = end_date - timedelta(days=1)
 
-    # TODO: Submit materialization job to scheduler
-    # For now, return mock response
+    try:
+        if start_date:
+            stats = await storage.materialize_backfill(
+                feature_set, start_date, end_date
+            )
+        else:
+            stats = await storage.materialize_incremental(feature_set, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error materializing feature set {feature_set.name}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to materialize feature set",
+        )
 
-    logger.info(f"Triggered materialization for feature set: {feature_set.name}")
+    logger.info(f"Materialized feature set: {feature_set.name}")
 
     return {
-        "message": f"Materialization triggered for '{feature_set.name}'",
+        "message": f"Materialization completed for '{feature_set.name}'",
         "feature_set_id": feature_set_id,
-        "start_date": start_date.isoformat(),
-        "end_date": end_date.isoformat(),
-        "job_id": "mock-job-id",
-        "status": "submitted",
+        **stats,
+    }
+
+
+@router.post("/{feature_set_id}/compact")
+async def compact_feature_set(
+    feature_set_id: str,
+    db: Session = Depends(get_db),
+    storage: FeatureStorage = Depends(get_storage),
+) -> Dict:
+    """Merge small offline files of a feature set into large sorted files"""
+
+    feature_set = db.query(FeatureSet).filter(FeatureSet.id == feature_set_id).first()
+
+    if not feature_set:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Feature set with ID '{feature_set_id}' not found",
+        )
+
+    try:
+        stats = await storage.compact_feature_set(feature_set)
+    except Exception as e:
+        logger.error(f"Error compacting feature set {feature_set.name}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to compact feature set",
+        )
+
+    return {
+        "message": f"Compaction completed for '{feature_set.name}'",
+        "feature_set_id": feature_set_id,
+        **stats,
     }
 
 
@@ -367,5 +424,10 @@ async def get_feature_set_statistics(
             if feature_set.last_materialization
             else None
         ),
+        "materialization_watermark": (
+            feature_set.materialization_watermark.isoformat()
+            if feature_set.materialization_watermark
+            else None
+        ),
         "status": feature_set.status.value,
     }
@@ -11,6 +11,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from core.database import get_db
+from core.metadata_cache import metadata_cache
 from models.feature import Feature, FeatureStatus, FeatureType
 
 logger = logging.getLogger(__name__)
@@ -111,6 +112,7 @@ async def create_feature(
         db.add(feature)
         db.commit()
         db.refresh(feature)
+        metadata_cache.invalidate(feature_set_id=feature.feature_set_id)
 
         logger.info(f"Created feature: {feature.name}")
 
@@ -195,6 +197,7 @@ async def update_feature(
 
     db.commit()
     db.refresh(feature)
+    metadata_cache.invalidate(feature_set_id=feature.feature_set_id)
 
     logger.info(f"Updated feature: {feature.name}")
 
@@ -221,8 +224,10 @@ async def delete_feature(feature_id: str, db: Session = Depends(get_db)) -> Dict
         )
 
     feature_name = feature.name
+    feature_set_id = feature.feature_set_id
     db.delete(feature)
     db.commit()
+    metadata_cache.invalidate(feature_set_id=feature_set_id)
 
     logger.info(f"Deleted feature: {feature_name}")
 
@@ -249,6 +254,7 @@ async def activate_feature(feature_id: str, db: Session = Depends(get_db)) -> Di
 
     feature.status = FeatureStatus.ACTIVE
     db.commit()
+    metadata_cache.invalidate(feature_set_id=feature.feature_set_id)
 
     logger.info(f"Activated feature: {feature.name}")
 
@@ -273,6 +279,7 @@ async def archive_feature(feature_id: str, db: Session = Depends(get_db)) -> Dic
 
     feature.status = FeatureStatus.ARCHIVED
     db.commit()
+    metadata_cache.invalidate(feature_set_id=feature.feature_set_id)
 
     logger.info(f"Archived feature: {feature.name}")
 
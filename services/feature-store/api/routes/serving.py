@@ -2,19 +2,40 @@
 Feature serving API endpoints
 """
 
+import itertools
 import logging
 import time
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import duckdb
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-
+from starlette.background import BackgroundTask
+
+from core.arrow_ipc import (
+    ARROW_STREAM_MEDIA_TYPE,
+    accepts_arrow,
+    columns_to_arrow,
+    dataframe_to_arrow,
+    ipc_stream_chunks,
+)
 from core.database import get_db
+from core.response_formats import (
+    RESPONSE_FORMATS,
+    accepts_msgpack,
+    columnar_features,
+    feature_columns,
+    json_response,
+    msgpack_response,
+)
 from core.serving_engine import ServingEngine
 from models.serving_request import (
     BatchServingRequest,
     FeatureServingResponse,
+    OfflineReadRequest,
     PointInTimeRequest,
     ServingRequest,
 )
@@ -23,42 +44,90 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def get_serving_engine(request: Request) -> ServingEngine:
+    """Get the application's serving engine"""
+    return request.app.state.serving_engine
+
+
 @router.post("/online", response_model=FeatureServingResponse)
 async def get_online_features(
     request: ServingRequest,
-    serving_engine: ServingEngine = Depends(lambda req: req.app.state.serving_engine),
-) -> FeatureServingResponse:
+    serving_engine: ServingEngine = Depends(get_serving_engine),
+    accept: Optional[str] = Header(None),
+):
     """
     Get online features for real-time serving
 
     This endpoint retrieves the latest feature values for given entities
-    from the online store with low latency.
+    from the online store with low latency. With ``timeout_ms`` set, features
+    not resolved by the deadline are returned with their default value and
+    ``partial`` is set in the response metadata.
+
+    Set ``response_format`` to ``columnar`` to list feature names once with
+    one value row per entity. Send ``Accept: application/x-msgpack`` for a
+    msgpack body, or ``Accept: application/vnd.apache.arrow.stream`` for an
+    Arrow IPC stream with one row per entity (metadata is then returned in
+    ``X-Feature-Store-*`` headers).
     """
     start_time = time.time()
+    stats = {}
 
     try:
+        if request.response_format not in RESPONSE_FORMATS:
+            raise ValueError(
+                f"Unknown response format '{request.response_format}', "
+                f"expected one of {', '.join(RESPONSE_FORMATS)}"
+            )
+
         # Get features from serving engine
         features = await serving_engine.get_online_features(
             feature_sets=request.feature_sets,
             entities=request.entities,
             features=request.features,
+            timeout_ms=request.timeout_ms,
+            stats=stats,
         )
 
         # Calculate metadata
         latency_ms = (time.time() - start_time) * 1000
-        feature_count = len(request.features) if request.features else 0
         entity_count = sum(len(ids) for ids in request.entities.values())
+        partial = stats.get("partial", False)
+
+        if accepts_arrow(accept):
+            table = columns_to_arrow(feature_columns(features, request.features))
+            return StreamingResponse(
+                ipc_stream_chunks(table.to_batches(), schema=table.schema),
+                media_type=ARROW_STREAM_MEDIA_TYPE,
+                headers={
+                    "X-Feature-Store-Latency-Ms": str(round(latency_ms, 2)),
+                    "X-Feature-Store-Row-Count": str(table.num_rows),
+                    "X-Feature-Store-Partial": str(partial).lower(),
+                },
+            )
 
-        return FeatureServingResponse(
-            features=features,
-            metadata={
-                "feature_count": feature_count,
+        # Serialize directly instead of validating every value through the
+        # response model
+        content = {
+            "features": (
+                columnar_features(features, request.features)
+                if request.response_format == "columnar"
+                else features
+            ),
+            "metadata": {
+                "feature_count": stats.get("feature_count", 0),
                 "entity_count": entity_count,
                 "latency_ms": round(latency_ms, 2),
-                "cache_hit": True if latency_ms < 10 else False,  # Simple heuristic
+                "cache_hit": stats.get("cache_misses", 0) == 0
+                and stats.get("cache_hits", 0) > 0,
+                "cache_hits": stats.get("cache_hits", 0),
+                "cache_misses": stats.get("cache_misses", 0),
+                "partial": partial,
                 "timestamp": datetime.utcnow().isoformat(),
             },
-        )
+        }
+        if accepts_msgpack(accept):
+            return msgpack_response(content)
+        return json_response(content)
 
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -73,13 +142,18 @@ async def get_online_features(
 @router.post("/historical", response_model=Dict)
 async def get_historical_features(
     request: PointInTimeRequest,
-    serving_engine: ServingEngine = Depends(lambda req: req.app.state.serving_engine),
-) -> Dict:
+    serving_engine: ServingEngine = Depends(get_serving_engine),
+    accept: Optional[str] = Header(None),
+):
     """
     Get point-in-time correct features for historical analysis
 
     This endpoint retrieves feature values as they were at specific timestamps,
     essential for training ML models and backtesting.
+
+    Send ``Accept: application/vnd.apache.arrow.stream`` to receive the result
+    as an Arrow IPC stream instead of JSON rows; response metadata is then
+    returned in ``X-Feature-Store-*`` headers.
     """
     start_time = time.time()
 
@@ -103,15 +177,29 @@ async def get_historical_features(
             entity_df=entity_df,
             features=request.features,
             timestamp_column=request.timestamp_column,
+            source=request.source,
         )
 
+        latency_ms = round((time.time() - start_time) * 1000, 2)
+
+        if accepts_arrow(accept):
+            table = dataframe_to_arrow(result_df)
+            return StreamingResponse(
+                ipc_stream_chunks(table.to_batches(), schema=table.schema),
+                media_type=ARROW_STREAM_MEDIA_TYPE,
+                headers={
+                    "X-Feature-Store-Latency-Ms": str(latency_ms),
+                    "X-Feature-Store-Row-Count": str(table.num_rows),
+                },
+            )
+
         # Convert result to JSON-serializable format
         result = {
             "columns": result_df.columns.tolist(),
             "data": result_df.values.tolist(),
             "shape": result_df.shape,
             "metadata": {
-                "latency_ms": round((time.time() - start_time) * 1000, 2),
+                "latency_ms": latency_ms,
                 "row_count": len(result_df),
                 "feature_count": len(result_df.columns) - len(entity_df.columns),
                 "timestamp": datetime.utcnow().isoformat(),
@@ -130,6 +218,78 @@ async def get_historical_features(
         )
 
 
+@router.post("/offline")
+async def read_offline_features(
+    request: OfflineReadRequest,
+    serving_engine: ServingEngine = Depends(get_serving_engine),
+) -> StreamingResponse:
+    """
+    Stream feature values from the offline store
+
+    The response is an Arrow IPC stream sent in chunks as DuckDB produces
+    record batches, so reads of any size are served in bounded memory. The
+    query is closed once the response ends, also when the client
+    disconnects early.
+    """
+    storage = serving_engine.storage
+    feature_set = await storage.get_feature_set_by_name(request.feature_set)
+
+    if not feature_set:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Feature set '{request.feature_set}' not found",
+        )
+
+    try:
+        batches = await storage.stream_feature_values(
+            feature_set,
+            features=request.features,
+            entity_ids=request.entity_ids,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            batch_size=request.batch_size,
+        )
+
+        # Run the query before responding so errors get a proper status code
+        first_batch = await run_in_threadpool(next, batches, None)
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+    except duckdb.BinderException as e:
+        logger.warning(f"Invalid offline read for {request.feature_set}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Requested features are not available in the offline store",
+        )
+    except Exception as e:
+        logger.error(f"Error reading offline features: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to read offline features",
+        )
+
+    stream = batches
+    if first_batch is not None:
+        stream = itertools.chain([first_batch], batches)
+
+    return StreamingResponse(
+        ipc_stream_chunks(stream),
+        media_type=ARROW_STREAM_MEDIA_TYPE,
+        background=BackgroundTask(_close_iterator, batches),
+    )
+
+
+def _close_iterator(iterator):
+    """Close an iterator early, releasing what it holds"""
+    close = getattr(iterator, "close", None)
+    if close is not None:
+        close()
+
+
 @router.post("/batch")
 async def submit_batch_serving_job(
     request: BatchServingRequest, db: Session = Depends(get_db)
@@ -0,0 +1,94 @@
+"""
+Arrow IPC stream encoding for Feature Store responses
+"""
+
+import io
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+
+from core.response_formats import accepts_media_type
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def accepts_arrow(accept: Optional[str]) -> bool:
+    """Whether an Accept header asks for an Arrow IPC stream"""
+    return accepts_media_type(accept, ARROW_STREAM_MEDIA_TYPE)
+
+
+def dataframe_to_arrow(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a DataFrame to an Arrow table
+
+    Object columns holding values of mixed types, which Arrow cannot give a
+    single type, are sent as strings.
+    """
+    arrays = [_to_arrow_array(df[name]) for name in df.columns]
+    return pa.Table.from_arrays(arrays, names=[str(name) for name in df.columns])
+
+
+def columns_to_arrow(columns: Dict[str, Sequence]) -> pa.Table:
+    """
+    Convert a column name to values mapping to an Arrow table
+
+    Columns of mixed types are sent as strings, as in dataframe_to_arrow.
+    """
+    arrays = [_to_arrow_array(values) for values in columns.values()]
+    return pa.Table.from_arrays(arrays, names=list(columns))
+
+
+def ipc_stream_chunks(
+    batches: Iterable[pa.RecordBatch], schema: Optional[pa.Schema] = None
+) -> Iterator[bytes]:
+    """
+    Encode record batches as an Arrow IPC stream, one chunk per batch
+
+    Only the batch being encoded is held in memory. The schema is taken from
+    the first batch unless given; a stream without batches carries just the
+    schema (empty if unknown).
+
+    Args:
+        batches: Record batches sharing one schema
+        schema: Optional stream schema
+
+    Yields:
+        Encoded stream chunks
+    """
+    buffer = io.BytesIO()
+    writer = None
+
+    for batch in batches:
+        if writer is None:
+            writer = pa.ipc.new_stream(buffer, schema or batch.schema)
+        writer.write_batch(batch)
+        yield _drain(buffer)
+
+    if writer is None:
+        writer = pa.ipc.new_stream(buffer, schema or pa.schema([]))
+    writer.close()
+    yield _drain(buffer)
+
+
+def _to_arrow_array(values) -> pa.Array:
+    """Convert values to an Arrow array, falling back to strings"""
+    try:
+        return pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(
+            [None if is_missing(v) else str(v) for v in values], type=pa.string()
+        )
+
+
+def is_missing(value) -> bool:
+    """Whether a scalar value is null or NaN"""
+    return value is None or (pd.api.types.is_scalar(value) and pd.isna(value))
+
+
+def _drain(buffer: io.BytesIO) -> bytes:
+    """Take the bytes written to a buffer so far and reset it"""
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
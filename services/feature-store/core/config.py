@@ -48,15 +48,70 @@ class Settings(BaseSettings):
     SERVING_BATCH_SIZE: int = Field(default=1000, env="SERVING_BATCH_SIZE")
     SERVING_CACHE_ENABLED: bool = Field(default=True, env="SERVING_CACHE_ENABLED")
     SERVING_CACHE_TTL: int = Field(default=300, env="SERVING_CACHE_TTL")
+    SERVING_CACHE_EARLY_REFRESH: bool = Field(
+        default=True, env="SERVING_CACHE_EARLY_REFRESH"
+    )
+    SERVING_CACHE_EARLY_REFRESH_BETA: float = Field(
+        default=1.0, env="SERVING_CACHE_EARLY_REFRESH_BETA"
+    )
+    # Write-behind queue for cache population off the request path
+    SERVING_CACHE_WRITE_QUEUE_SIZE: int = Field(
+        default=10000, env="SERVING_CACHE_WRITE_QUEUE_SIZE"
+    )
+    SERVING_CACHE_WRITE_BATCH_SIZE: int = Field(
+        default=500, env="SERVING_CACHE_WRITE_BATCH_SIZE"
+    )
     ONLINE_STORE_ENABLED: bool = Field(default=True, env="ONLINE_STORE_ENABLED")
+    # Online cache layout: hash (one hash per entity and feature set) or key
+    ONLINE_CACHE_LAYOUT: str = Field(default="hash", env="ONLINE_CACHE_LAYOUT")
+    ONLINE_CACHE_KEY_PREFIX: str = Field(default="fs:v2", env="ONLINE_CACHE_KEY_PREFIX")
+
+    # Metadata cache
+    METADATA_CACHE_ENABLED: bool = Field(default=True, env="METADATA_CACHE_ENABLED")
+    METADATA_CACHE_TTL: int = Field(default=60, env="METADATA_CACHE_TTL")
+    METADATA_CACHE_MAX_SIZE: int = Field(default=1000, env="METADATA_CACHE_MAX_SIZE")
 
     # Feature computation
     COMPUTE_ENGINE: str = Field(default="duckdb", env="COMPUTE_ENGINE")  # duckdb, spark
     MAX_COMPUTE_THREADS: int = Field(default=4, env="MAX_COMPUTE_THREADS")
+    # Streamed offline reads, counted separately from MAX_COMPUTE_THREADS
+    DUCKDB_MAX_STREAMS: int = Field(default=2, env="DUCKDB_MAX_STREAMS")
+    DUCKDB_STREAM_WAIT_SECONDS: float = Field(
+        default=10.0, env="DUCKDB_STREAM_WAIT_SECONDS"
+    )
+    DUCKDB_DATABASE_PATH: str = Field(
+        default="/tmp/feature_store/catalog.duckdb", env="DUCKDB_DATABASE_PATH"
+    )
+    DUCKDB_CATALOG_REFRESH_SECONDS: int = Field(
+        default=300, env="DUCKDB_CATALOG_REFRESH_SECONDS"
+    )
     MATERIALIZATION_BATCH_SIZE: int = Field(
         default=10000, env="MATERIALIZATION_BATCH_SIZE"
     )
 
+    # Offline store compaction
+    # Background job, off by default; enable it on one or a few instances
+    COMPACTION_ENABLED: bool = Field(default=False, env="COMPACTION_ENABLED")
+    COMPACTION_INTERVAL_SECONDS: int = Field(
+        default=3600, env="COMPACTION_INTERVAL_SECONDS"
+    )
+    COMPACTION_MIN_FILES: int = Field(default=4, env="COMPACTION_MIN_FILES")
+    COMPACTION_SMALL_FILE_BYTES: int = Field(
+        default=64 * 1024 * 1024, env="COMPACTION_SMALL_FILE_BYTES"
+    )
+    # Upper bound on the input bytes merged into one compacted file
+    COMPACTION_TARGET_FILE_BYTES: int = Field(
+        default=512 * 1024 * 1024, env="COMPACTION_TARGET_FILE_BYTES"
+    )
+    COMPACTION_ROW_GROUP_SIZE: int = Field(
+        default=122880, env="COMPACTION_ROW_GROUP_SIZE"
+    )
+    # Replaced files outlive in-flight reads and stale catalogs of other
+    # instances; keep this above DUCKDB_CATALOG_REFRESH_SECONDS
+    COMPACTION_DELETE_GRACE_SECONDS: int = Field(
+        default=900, env="COMPACTION_DELETE_GRACE_SECONDS"
+    )
+
     # Feature validation
     VALIDATION_ENABLED: bool = Field(default=True, env="VALIDATION_ENABLED")
     VALIDATION_SAMPLE_SIZE: int = Field(default=1000, env="VALIDATION_SAMPLE_SIZE")
@@ -65,6 +120,10 @@ class Settings(BaseSettings):
     ENABLE_METRICS: bool = Field(default=True, env="ENABLE_METRICS")
     ENABLE_TRACING: bool = Field(default=True, env="ENABLE_TRACING")
     METRICS_PORT: int = Field(default=8003, env="METRICS_PORT")
+    # Fraction of online requests logged as feature_access events
+    FEATURE_ACCESS_LOG_SAMPLE_RATE: float = Field(
+        default=0.01, env="FEATURE_ACCESS_LOG_SAMPLE_RATE"
+    )
 
     # Security
     API_KEY_ENABLED: bool = Field(default=False, env="API_KEY_ENABLED")
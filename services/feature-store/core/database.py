@@ -5,7 +5,8 @@ Database configuration and connection management for Feature Store
 import logging
 
 from databases import Database
-from sqlalchemy import MetaData, create_engine
+from sqlalchemy import MetaData, create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -28,10 +29,40 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    """Map a database URL onto its asyncio driver"""
+    for scheme in ("postgresql://", "postgresql+psycopg2://", "postgres://"):
+        if url.startswith(scheme):
+            return "postgresql+asyncpg://" + url[len(scheme) :]
+    return url
+
+
+# Create async SQLAlchemy engine for the serving and storage hot paths
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_POOL_OVERFLOW,
+    pool_pre_ping=True,
+    echo=settings.DEBUG,
+)
+
+# Create async session factory
+AsyncSessionLocal = sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
 # Create base class for models
 Base = declarative_base()
 metadata = MetaData()
 
+# Columns added to existing tables, which create_all does not alter.
+# Each statement must be idempotent.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE feature_sets "
+    "ADD COLUMN IF NOT EXISTS materialization_watermark TIMESTAMP",
+]
+
 
 async def init_db():
     """Initialize database connection"""
@@ -41,6 +72,11 @@ async def init_db():
 
         # Create tables if they don't exist
         Base.metadata.create_all(bind=engine)
+
+        # Add columns introduced since the tables were created
+        with engine.begin() as conn:
+            for statement in SCHEMA_UPGRADES:
+                conn.execute(text(statement))
         logger.info("Database tables initialized")
 
     except Exception as e:
@@ -52,6 +88,7 @@ async def close_db():
     """Close database connection"""
     try:
         await database.disconnect()
+        await async_engine.dispose()
         logger.info("Database connection closed")
     except Exception as e:
         logger.error(f"Error closing database connection: {e}")
@@ -64,3 +101,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Get async database session"""
+    async with AsyncSessionLocal() as session:
+        yield session
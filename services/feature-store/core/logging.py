@@ -58,20 +58,24 @@ def get_logger(name: str) -> Any:
 
 def log_feature_access(
     feature_set: str,
-    features: list,
-    entity_ids: list,
+    feature_count: int,
+    entity_count: int,
     latency_ms: float,
-    cache_hit: bool = False,
+    cache_hits: int = 0,
+    cache_misses: int = 0,
+    sample_rate: float = 1.0,
 ) -> None:
-    """Log feature access for monitoring"""
+    """Log feature access for monitoring, sampled at the given rate"""
     logger = get_logger("feature_access")
     logger.info(
         "feature_access",
         feature_set=feature_set,
-        features=features,
-        entity_count=len(entity_ids),
+        feature_count=feature_count,
+        entity_count=entity_count,
         latency_ms=latency_ms,
-        cache_hit=cache_hit,
+        cache_hits=cache_hits,
+        cache_misses=cache_misses,
+        sample_rate=sample_rate,
     )
 
 
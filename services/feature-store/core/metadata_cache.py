@@ -0,0 +1,104 @@
+"""
+In-process metadata cache for feature set and feature definitions
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from core.config import settings
+from models.feature import Feature
+from models.feature_set import FeatureSet
+
+
+class MetadataCache:
+    """
+    Size-bounded, TTL and version invalidated cache of feature set definitions
+
+    Feature sets are cached with their features loaded, keyed by both name
+    and ID, so serving hot paths resolve metadata with dictionary lookups.
+    Entries expire after the TTL (bounding staleness across workers) and are
+    dropped explicitly when a route bumps the feature set version.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, FeatureSet]]" = OrderedDict()
+        self._ids_by_name: Dict[str, str] = {}
+
+    def get_feature_set(self, name: str) -> Optional[FeatureSet]:
+        """Get a cached feature set by name"""
+        feature_set_id = self._ids_by_name.get(name)
+        if feature_set_id is None:
+            return None
+        return self.get_feature_set_by_id(feature_set_id)
+
+    def get_feature_set_by_id(self, feature_set_id) -> Optional[FeatureSet]:
+        """Get a cached feature set by ID"""
+        key = str(feature_set_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, feature_set = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return feature_set
+
+    def get_features(
+        self, feature_set_id, feature_names: List[str]
+    ) -> Optional[List[Feature]]:
+        """Get cached features by name, or None if the feature set is not cached"""
+        feature_set = self.get_feature_set_by_id(feature_set_id)
+        if feature_set is None:
+            return None
+
+        names = set(feature_names)
+        return [f for f in feature_set.features if f.name in names]
+
+    def put_feature_set(self, feature_set: FeatureSet):
+        """Cache a feature set whose features are already loaded"""
+        key = str(feature_set.id)
+
+        # Never replace a newer definition with an older one
+        cached = self._entries.get(key)
+        if cached and (cached[1].version or 0) > (feature_set.version or 0):
+            return
+
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, feature_set)
+        self._ids_by_name[feature_set.name] = key
+
+        while len(self._entries) > self.max_size:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def invalidate(self, feature_set_id=None, name: Optional[str] = None):
+        """Drop a feature set from the cache by ID and/or name"""
+        if name is not None and name in self._ids_by_name:
+            self._remove(self._ids_by_name[name])
+        if feature_set_id is not None:
+            self._remove(str(feature_set_id))
+
+    def clear(self):
+        """Drop all cached metadata"""
+        self._entries.clear()
+        self._ids_by_name.clear()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            name = entry[1].name
+            if self._ids_by_name.get(name) == key:
+                del self._ids_by_name[name]
+
+
+# Global metadata cache instance
+metadata_cache = MetadataCache(
+    max_size=settings.METADATA_CACHE_MAX_SIZE,
+    ttl_seconds=settings.METADATA_CACHE_TTL,
+)
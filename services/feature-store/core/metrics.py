@@ -76,6 +76,14 @@ class FeatureStoreMetrics:
             registry=self.registry,
         )
 
+        self.feature_set_fetch_latency = Histogram(
+            "feature_store_feature_set_fetch_duration_seconds",
+            "Online storage fetch latency per feature set",
+            ["feature_set"],
+            buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0],
+            registry=self.registry,
+        )
+
         self.storage_operations = Counter(
             "feature_store_storage_operations_total",
             "Storage operations (DuckDB, S3)",
@@ -90,6 +98,19 @@ class FeatureStoreMetrics:
             registry=self.registry,
         )
 
+        self.cache_writes = Counter(
+            "feature_store_cache_writes_total",
+            "Write-behind cache entries by outcome",
+            ["result"],
+            registry=self.registry,
+        )
+
+        self.cache_write_queue_depth = Gauge(
+            "feature_store_cache_write_queue_depth",
+            "Cache entries waiting in the write-behind queue",
+            registry=self.registry,
+        )
+
         # System metrics
         self.database_connections = Gauge(
             "feature_store_database_connections",
@@ -131,6 +152,20 @@ class FeatureStoreMetrics:
         result = "hit" if hit else "miss"
         self.cache_operations.labels(operation=operation, result=result).inc()
 
+    def track_cache_lookups(self, operation: str, result: str, count: int = 1):
+        """Track a batch of cache lookups with a hit, stale or miss result"""
+        if count:
+            self.cache_operations.labels(operation=operation, result=result).inc(count)
+
+    def track_cache_writes(self, result: str, count: int = 1):
+        """Track write-behind cache entries queued, dropped, flushed or failed"""
+        if count:
+            self.cache_writes.labels(result=result).inc(count)
+
+    def update_cache_write_queue_depth(self, depth: int):
+        """Update the write-behind cache queue depth"""
+        self.cache_write_queue_depth.set(depth)
+
     def update_feature_sets_count(self, count: int):
         """Update active feature sets count"""
         self.active_feature_sets.set(count)
@@ -143,6 +178,10 @@ class FeatureStoreMetrics:
         """Record query duration"""
         self.query_latency.labels(query_type=query_type).observe(duration)
 
+    def record_feature_set_fetch(self, feature_set: str, duration: float):
+        """Record storage fetch duration for one feature set"""
+        self.feature_set_fetch_latency.labels(feature_set=feature_set).observe(duration)
+
     def get_metrics(self) -> str:
         """Get metrics in Prometheus format"""
         return generate_latest(self.registry).decode("utf-8")
@@ -0,0 +1,205 @@
+"""
+Redis online cache layouts for Feature Store serving
+"""
+
+import json
+from datetime import date, datetime
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+import msgpack
+import redis.asyncio as redis
+
+from core.config import settings
+
+# (entity_type, entity_id, feature_set_name)
+CacheKey = Tuple[str, str, str]
+
+
+class OnlineCache:
+    """
+    Online feature cache backed by Redis
+
+    Two layouts are supported:
+    - ``hash``: one Redis hash per entity per feature set under a versioned
+      key prefix, with msgpack-encoded field values and a single TTL
+    - ``key``: legacy layout with one JSON-encoded key per entity feature
+
+    Every call is issued as one pipelined round-trip regardless of how many
+    entities and features it covers.
+    """
+
+    LAYOUTS = ("hash", "key")
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        layout: str = "hash",
+        key_prefix: str = "fs:v2",
+        ttl: int = 300,
+    ):
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown online cache layout '{layout}'")
+
+        self.client = client
+        self.layout = layout
+        self.key_prefix = key_prefix
+        self.ttl = ttl
+
+    @classmethod
+    def from_settings(cls, client: redis.Redis) -> "OnlineCache":
+        """Create an online cache configured from settings"""
+        return cls(
+            client,
+            layout=settings.ONLINE_CACHE_LAYOUT,
+            key_prefix=settings.ONLINE_CACHE_KEY_PREFIX,
+            ttl=settings.SERVING_CACHE_TTL,
+        )
+
+    def entity_key(self, entity_type: str, entity_id: str, feature_set: str) -> str:
+        """Redis key of an entity's hash for a feature set"""
+        return f"{self.key_prefix}:{entity_type}:{entity_id}:{feature_set}"
+
+    @staticmethod
+    def feature_key(entity_type: str, entity_id: str, feature: str) -> str:
+        """Redis key of a single entity feature in the legacy layout"""
+        return f"feature:{entity_type}:{entity_id}:{feature}"
+
+    async def get_many(
+        self, requests: Dict[CacheKey, List[str]]
+    ) -> Dict[CacheKey, Dict[str, any]]:
+        """
+        Get cached feature values
+
+        Args:
+            requests: Cache key to requested feature names mapping
+
+        Returns:
+            Cache key to cached feature values mapping; features that are not
+            cached are omitted and keys without any cached value are dropped
+        """
+        values, _ = await self._get_many(requests, include_ttl=False)
+        return values
+
+    async def get_many_with_ttl(
+        self, requests: Dict[CacheKey, List[str]]
+    ) -> Tuple[Dict[CacheKey, Dict[str, any]], Dict[CacheKey, float]]:
+        """
+        Get cached feature values along with their remaining TTL
+
+        The TTL lookups ride in the same pipelined round-trip as the values.
+
+        Returns:
+            Tuple of cached values (as in get_many) and remaining TTL in
+            seconds per cache key with cached values
+        """
+        return await self._get_many(requests, include_ttl=True)
+
+    async def _get_many(
+        self, requests: Dict[CacheKey, List[str]], include_ttl: bool
+    ) -> Tuple[Dict[CacheKey, Dict[str, any]], Dict[CacheKey, float]]:
+        requests = {key: names for key, names in requests.items() if names}
+        if not requests:
+            return {}, {}
+
+        pipe = self.client.pipeline(transaction=False)
+        for (entity_type, entity_id, feature_set), names in requests.items():
+            if self.layout == "hash":
+                key = self.entity_key(entity_type, entity_id, feature_set)
+                pipe.hmget(key, names)
+                if include_ttl:
+                    pipe.pttl(key)
+            else:
+                keys = [self.feature_key(entity_type, entity_id, n) for n in names]
+                pipe.mget(keys)
+                if include_ttl:
+                    for key in keys:
+                        pipe.pttl(key)
+
+        responses = iter(await pipe.execute())
+
+        result = {}
+        ttls = {}
+        for key, names in requests.items():
+            values = next(responses)
+            cached = {
+                name: self._decode(value)
+                for name, value in zip(names, values)
+                if value is not None
+            }
+
+            if include_ttl:
+                ttl_count = 1 if self.layout == "hash" else len(names)
+                # Negative PTTL means missing key or no expiry
+                remaining = [ttl for ttl in islice(responses, ttl_count) if ttl >= 0]
+                if cached:
+                    ttls[key] = min(remaining) / 1000 if remaining else float("inf")
+
+            if cached:
+                result[key] = cached
+
+        return result, ttls
+
+    async def set_many(
+        self,
+        values: Dict[CacheKey, Dict[str, any]],
+        ttl: Optional[int] = None,
+        extend_ttl: bool = True,
+    ):
+        """
+        Cache feature values
+
+        Args:
+            values: Cache key to feature values mapping
+            ttl: Optional TTL in seconds, defaults to the cache TTL
+            extend_ttl: Whether to reset the TTL of existing entity hashes;
+                writes adding a few fields to a hash should leave the expiry
+                of its other fields alone
+        """
+        ttl = ttl or self.ttl
+        pipe = self.client.pipeline(transaction=False)
+        commands = 0
+
+        for (entity_type, entity_id, feature_set), features in values.items():
+            if not features:
+                continue
+
+            if self.layout == "hash":
+                key = self.entity_key(entity_type, entity_id, feature_set)
+                pipe.hset(
+                    key,
+                    mapping={
+                        name: self._encode(value) for name, value in features.items()
+                    },
+                )
+                # NX only sets the expiry of hashes created by this write
+                pipe.expire(key, ttl, nx=not extend_ttl)
+                commands += 2
+            else:
+                for name, value in features.items():
+                    pipe.setex(
+                        self.feature_key(entity_type, entity_id, name),
+                        ttl,
+                        self._encode(value),
+                    )
+                    commands += 1
+
+        if commands:
+            await pipe.execute()
+
+    def _encode(self, value: any) -> bytes:
+        if self.layout == "hash":
+            return msgpack.packb(value, default=msgpack_default, use_bin_type=True)
+        return json.dumps(value).encode("utf-8")
+
+    def _decode(self, value: bytes) -> any:
+        if self.layout == "hash":
+            return msgpack.unpackb(value, raw=False)
+        return json.loads(value)
+
+
+def msgpack_default(value: any) -> any:
+    """Encode values msgpack does not support natively"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode value of type {type(value).__name__}")
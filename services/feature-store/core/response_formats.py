@@ -0,0 +1,89 @@
+"""
+Compact encodings for online serving responses
+"""
+
+from typing import Dict, List, Optional
+
+import msgpack
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from core.online_cache import msgpack_default
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+# Shapes of the features payload: nested rows per entity, or columnar
+RESPONSE_FORMATS = ("rows", "columnar")
+
+
+def accepts_media_type(accept: Optional[str], media_type: str) -> bool:
+    """Whether an Accept header lists a media type"""
+    if not accept:
+        return False
+    media_types = [part.split(";", 1)[0].strip() for part in accept.split(",")]
+    return media_type in media_types
+
+
+def accepts_msgpack(accept: Optional[str]) -> bool:
+    """Whether an Accept header asks for msgpack"""
+    return accepts_media_type(accept, MSGPACK_MEDIA_TYPE)
+
+
+def columnar_features(
+    features: Dict[str, Dict[str, any]], feature_names: Optional[List[str]] = None
+) -> Dict[str, list]:
+    """
+    Convert entity ID to features mapping to a columnar layout
+
+    Feature names are listed once instead of once per entity; each entity
+    gets one row of values in feature name order, with None for features
+    it has no value for.
+
+    Args:
+        features: Entity ID to features mapping
+        feature_names: Optional feature order, defaults to order of appearance
+
+    Returns:
+        Dict of entity_ids, feature_names and values (one row per entity)
+    """
+    if feature_names is None:
+        feature_names = list(
+            dict.fromkeys(name for values in features.values() for name in values)
+        )
+
+    return {
+        "entity_ids": list(features),
+        "feature_names": feature_names,
+        "values": [
+            [values.get(name) for name in feature_names] for values in features.values()
+        ],
+    }
+
+
+def feature_columns(
+    features: Dict[str, Dict[str, any]], feature_names: Optional[List[str]] = None
+) -> Dict[str, list]:
+    """
+    Convert entity ID to features mapping to one value list per column
+
+    Returns:
+        Column name to values mapping, starting with an entity_id column
+    """
+    columnar = columnar_features(features, feature_names)
+    columns = {"entity_id": columnar["entity_ids"]}
+    for index, name in enumerate(columnar["feature_names"]):
+        columns[name] = [row[index] for row in columnar["values"]]
+    return columns
+
+
+def json_response(content: dict) -> Response:
+    """Serialize a response body with orjson, skipping model validation"""
+    return ORJSONResponse(content)
+
+
+def msgpack_response(content: dict) -> Response:
+    """Serialize a response body with msgpack"""
+    return Response(
+        content=msgpack.packb(content, default=msgpack_default, use_bin_type=True),
+        media_type=MSGPACK_MEDIA_TYPE,
+    )
@@ -2,11 +2,12 @@
 Feature serving engine for real-time and batch feature retrieval
 """
 
-import json
+import asyncio
 import logging
+import math
+import random
 import time
-from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import redis.asyncio as redis
@@ -14,6 +15,8 @@ from redis.asyncio import ConnectionPool
 
 from core.config import settings
 from core.logging import log_feature_access
+from core.metrics import feature_store_metrics
+from core.online_cache import CacheKey, OnlineCache
 from models.feature_set import FeatureSet
 
 logger = logging.getLogger(__name__)
@@ -26,9 +29,29 @@ class ServingEngine:
         self.storage = storage
         self.redis_pool: Optional[ConnectionPool] = None
         self.redis_client: Optional[redis.Redis] = None
+        self.online_cache: Optional[OnlineCache] = None
         self.cache_enabled = settings.SERVING_CACHE_ENABLED
         self.cache_ttl = settings.SERVING_CACHE_TTL
 
+        # Bounds concurrent storage queries to the database pool size
+        self._storage_semaphore = asyncio.Semaphore(settings.DATABASE_POOL_SIZE)
+
+        # In-flight storage loads by cache key: (feature names, future)
+        self._inflight_loads: Dict[CacheKey, Tuple[set, asyncio.Future]] = {}
+
+        # Early refresh state: smoothed storage fetch time (the XFetch delta),
+        # keys being refreshed and running background tasks
+        self._fetch_seconds = 0.0
+        self._refreshing: set = set()
+        self._background_tasks: set = set()
+
+        # Write-behind cache population: entries fetched from storage are
+        # queued and flushed in batches by a single writer task
+        self._cache_write_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.SERVING_CACHE_WRITE_QUEUE_SIZE
+        )
+        self._cache_writer: Optional[asyncio.Task] = None
+
     async def start(self):
         """Initialize serving engine"""
         if self.cache_enabled and settings.ONLINE_STORE_ENABLED:
@@ -37,13 +60,17 @@ class ServingEngine:
                 self.redis_pool = ConnectionPool.from_url(
                     settings.REDIS_URL,
                     max_connections=settings.REDIS_MAX_CONNECTIONS,
-                    decode_responses=True,
                 )
                 self.redis_client = redis.Redis(connection_pool=self.redis_pool)
 
                 # Test connection
                 await self.redis_client.ping()
-                logger.info("Feature serving engine initialized with Redis cache")
+                self.online_cache = OnlineCache.from_settings(self.redis_client)
+                self._cache_writer = asyncio.create_task(self._run_cache_writer())
+                logger.info(
+                    "Feature serving engine initialized with Redis cache "
+                    f"({self.online_cache.layout} layout)"
+                )
 
             except Exception as e:
                 logger.warning(
@@ -55,6 +82,14 @@ class ServingEngine:
 
     async def stop(self):
         """Cleanup serving engine resources"""
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        if self._cache_writer:
+            # Flush queued cache writes before closing the connection
+            await self._cache_write_queue.join()
+            self._cache_writer.cancel()
+            await asyncio.gather(self._cache_writer, return_exceptions=True)
+            self._cache_writer = None
         if self.redis_client:
             await self.redis_client.close()
         if self.redis_pool:
@@ -65,23 +100,38 @@ class ServingEngine:
         feature_sets: List[str],
         entities: Dict[str, List[str]],
         features: Optional[List[str]] = None,
+        timeout_ms: Optional[int] = None,
+        stats: Optional[Dict[str, any]] = None,
     ) -> Dict[str, Dict[str, any]]:
         """
         Get features from online store for serving
 
+        Features fetched from storage are written back to the cache by a
+        background writer, off the request path. With a timeout, cache lookups
+        and storage fallbacks still running at the deadline are cancelled and
+        features left unresolved are served with their default value.
+
         Args:
             feature_sets: List of feature set names
             entities: Entity type to entity IDs mapping
             features: Optional list of specific features
+            timeout_ms: Optional time budget for the request in milliseconds
+            stats: Optional dict filled with serving statistics: feature,
+                cache hit and miss counts, and ``partial`` when defaults were
+                served for unresolved features
 
         Returns:
             Entity ID to features mapping
         """
         start_time = time.time()
+        deadline = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
         cache_hits = 0
         total_lookups = 0
+        unresolved = 0
 
         try:
+            stage_start = time.perf_counter()
+
             # Validate feature sets exist
             valid_feature_sets = await self._validate_feature_sets(feature_sets)
 
@@ -89,53 +139,119 @@ class ServingEngine:
             if not features:
                 features = await self._get_all_features(valid_feature_sets)
 
-            # Build result dictionary
-            result = {}
-
-            # Batch fetch features for all entities
-            for entity_type, entity_ids in entities.items():
-                for entity_id in entity_ids:
-                    if entity_id not in result:
-                        result[entity_id] = {}
-
-                    # Try cache first
-                    if self.cache_enabled:
-                        cached_features = await self._get_cached_features(
-                            entity_id, entity_type, features
-                        )
-                        if cached_features:
-                            result[entity_id].update(cached_features)
-                            cache_hits += len(cached_features)
-                            total_lookups += len(features)
-                            continue
-
-                    # Fetch from storage
-                    stored_features = await self._get_stored_features(
-                        entity_id, entity_type, features, valid_feature_sets
+            # Flatten and de-duplicate (entity_type, entity_id) pairs so the
+            # whole request is resolved in a constant number of round-trips
+            entity_keys = list(
+                dict.fromkeys(
+                    (entity_type, entity_id)
+                    for entity_type, entity_ids in entities.items()
+                    for entity_id in entity_ids
+                )
+            )
+            result = {entity_id: {} for _, entity_id in entity_keys}
+
+            # One lookup group per entity and feature set
+            features_by_set = self._group_features_by_set(valid_feature_sets, features)
+            lookups = {
+                (entity_type, entity_id, fs_name): fs_features
+                for entity_type, entity_id in entity_keys
+                for fs_name, fs_features in features_by_set.items()
+            }
+            total_lookups = len(entity_keys) * sum(map(len, features_by_set.values()))
+            stage_start = self._record_stage("metadata", stage_start)
+
+            # Try cache first with a single batched lookup
+            cached_features = {}
+            stale_keys = []
+            if self.cache_enabled:
+                try:
+                    cached_features, stale_keys = await self._before_deadline(
+                        self._get_cached_features(lookups), deadline
                     )
+                except asyncio.TimeoutError:
+                    logger.warning("Online cache lookup cancelled at request deadline")
+                stage_start = self._record_stage("cache", stage_start)
+
+            for (_, entity_id, _), values in cached_features.items():
+                result[entity_id].update(values)
+                cache_hits += len(values)
+
+            # Serve stale entries now and revalidate them in the background.
+            # Refreshes reload every feature of the entity hash, since
+            # rewriting it extends the TTL of all of its fields.
+            if stale_keys:
+                sets_by_name = {fs.name: fs for fs in valid_feature_sets}
+                self._schedule_refresh(
+                    {
+                        key: sets_by_name[key[2]].get_feature_names()
+                        for key in stale_keys
+                    },
+                    valid_feature_sets,
+                )
 
-                    if stored_features:
-                        result[entity_id].update(stored_features)
+            # Fetch only the features missing from cache in one set-based pass
+            missing = {}
+            for key, names in lookups.items():
+                cached = cached_features.get(key, {})
+                missing_names = [name for name in names if name not in cached]
+                if missing_names:
+                    missing[key] = missing_names
+
+            if missing:
+                stored_features = {}
+                shared_features = {}
+                try:
+                    stored_features, shared_features = await self._before_deadline(
+                        self._load_features(missing, valid_feature_sets), deadline
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        "Storage fallback cancelled at request deadline, "
+                        "serving defaults"
+                    )
+                    unresolved = self._fill_defaults(
+                        result, missing, valid_feature_sets
+                    )
+                self._record_stage("storage", stage_start)
+
+                for values_by_key in (stored_features, shared_features):
+                    for (_, entity_id, _), values in values_by_key.items():
+                        result[entity_id].update(values)
 
-                        # Update cache
-                        if self.cache_enabled:
-                            await self._cache_features(
-                                entity_id, entity_type, stored_features
-                            )
+                # Write back only the features this request fetched
+                if self.cache_enabled and stored_features:
+                    self._queue_cache_writes(stored_features)
 
-                    total_lookups += len(features)
+            if self.cache_enabled:
+                stale_hits = sum(len(cached_features[key]) for key in stale_keys)
+                feature_store_metrics.track_cache_lookups(
+                    "online", "hit", cache_hits - stale_hits
+                )
+                feature_store_metrics.track_cache_lookups("online", "stale", stale_hits)
+                feature_store_metrics.track_cache_lookups(
+                    "online", "miss", total_lookups - cache_hits
+                )
 
-            # Log access metrics
+            # Log a sample of accesses to keep logging off the hot path
             latency_ms = (time.time() - start_time) * 1000
-            cache_hit_rate = cache_hits / total_lookups if total_lookups > 0 else 0
+            sample_rate = settings.FEATURE_ACCESS_LOG_SAMPLE_RATE
+            if sample_rate > 0 and random.random() < sample_rate:
+                log_feature_access(
+                    feature_set=",".join(feature_sets),
+                    feature_count=len(features),
+                    entity_count=len(entity_keys),
+                    latency_ms=latency_ms,
+                    cache_hits=cache_hits,
+                    cache_misses=total_lookups - cache_hits,
+                    sample_rate=sample_rate,
+                )
 
-            log_feature_access(
-                feature_set=",".join(feature_sets),
-                features=features,
-                entity_ids=[id for ids in entities.values() for id in ids],
-                latency_ms=latency_ms,
-                cache_hit=cache_hit_rate > 0,
-            )
+            if stats is not None:
+                stats["feature_count"] = len(features)
+                stats["cache_hits"] = cache_hits
+                stats["cache_misses"] = total_lookups - cache_hits
+                stats["partial"] = unresolved > 0
+                stats["unresolved_features"] = unresolved
 
             return result
 
@@ -149,6 +265,7 @@ class ServingEngine:
         entity_df: pd.DataFrame,
         features: Optional[List[str]] = None,
         timestamp_column: str = "event_timestamp",
+        source: str = "database",
     ) -> pd.DataFrame:
         """
         Get point-in-time correct features for historical analysis
@@ -158,6 +275,7 @@ class ServingEngine:
             entity_df: DataFrame with entity IDs and timestamps
             features: Optional list of specific features
             timestamp_column: Name of timestamp column
+            source: Where to read history from - database or offline
 
         Returns:
             DataFrame with entity features at specified timestamps
@@ -168,6 +286,8 @@ class ServingEngine:
             # Validate inputs
             if timestamp_column not in entity_df.columns:
                 raise ValueError(f"Timestamp column '{timestamp_column}' not found")
+            if source not in ("database", "offline"):
+                raise ValueError(f"Unknown historical feature source '{source}'")
 
             # Validate feature sets
             valid_feature_sets = await self._validate_feature_sets(feature_sets)
@@ -176,24 +296,27 @@ class ServingEngine:
             if not features:
                 features = await self._get_all_features(valid_feature_sets)
 
-            # Initialize result dataframe
-            result_df = entity_df.copy()
-
-            # For each feature, get point-in-time values
-            for feature_name in features:
-                feature_values = []
-
-                for idx, row in entity_df.iterrows():
-                    # Get feature value at specified timestamp
-                    value = await self._get_feature_at_timestamp(
-                        entity_id=row.get("entity_id", row.get("id")),
-                        feature_name=feature_name,
-                        timestamp=row[timestamp_column],
-                        feature_sets=valid_feature_sets,
-                    )
-                    feature_values.append(value)
+            # Resolve entity column
+            entity_column = next(
+                (col for col in ("entity_id", "id") if col in entity_df.columns),
+                None,
+            )
+            if entity_column is None:
+                raise ValueError("Entity column 'entity_id' or 'id' not found")
 
-                result_df[feature_name] = feature_values
+            result_df = entity_df.copy()
+            join = (
+                self._offline_point_in_time_join
+                if source == "offline"
+                else self._point_in_time_join
+            )
+            result_df = await join(
+                result_df,
+                entity_column=entity_column,
+                timestamp_column=timestamp_column,
+                features=features,
+                feature_sets=valid_feature_sets,
+            )
 
             # Log metrics
             latency_ms = (time.time() - start_time) * 1000
@@ -229,102 +352,509 @@ class ServingEngine:
             features.extend(fs.get_feature_names())
         return list(set(features))  # Remove duplicates
 
+    def _group_features_by_set(
+        self, feature_sets: List[FeatureSet], features: List[str]
+    ) -> Dict[str, List[str]]:
+        """Assign each requested feature to the first feature set defining it"""
+        remaining = list(dict.fromkeys(features))
+        features_by_set = {}
+
+        for feature_set in feature_sets:
+            defined = set(feature_set.get_feature_names())
+            fs_features = [name for name in remaining if name in defined]
+            if fs_features:
+                features_by_set[feature_set.name] = fs_features
+                remaining = [name for name in remaining if name not in defined]
+
+        return features_by_set
+
+    @staticmethod
+    def _record_stage(stage: str, stage_start: float) -> float:
+        """
+        Record the duration of an online serving stage
+
+        Returns:
+            Performance counter value at the end of the stage
+        """
+        now = time.perf_counter()
+        feature_store_metrics.record_query_duration(
+            f"online_{stage}", now - stage_start
+        )
+        return now
+
+    @staticmethod
+    async def _before_deadline(awaitable, deadline: Optional[float]):
+        """
+        Await a coroutine, cancelling it at a monotonic deadline
+
+        Raises:
+            asyncio.TimeoutError: If the deadline passes first
+        """
+        if deadline is None:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, max(deadline - time.monotonic(), 0))
+
+    def _fill_defaults(
+        self,
+        result: Dict[str, Dict[str, any]],
+        lookups: Dict[CacheKey, List[str]],
+        feature_sets: List[FeatureSet],
+    ) -> int:
+        """
+        Serve the default value of every looked up feature not yet resolved
+
+        Returns:
+            Number of entity features filled with defaults
+        """
+        defaults = {}
+        for feature_set in feature_sets:
+            for feature in feature_set.features:
+                defaults.setdefault(
+                    (feature_set.name, feature.name), feature.default_value
+                )
+
+        filled = 0
+        for (_, entity_id, fs_name), names in lookups.items():
+            values = result[entity_id]
+            for name in names:
+                if name not in values:
+                    values[name] = defaults.get((fs_name, name))
+                    filled += 1
+        return filled
+
     async def _get_cached_features(
-        self, entity_id: str, entity_type: str, features: List[str]
-    ) -> Optional[Dict[str, any]]:
-        """Get features from Redis cache"""
-        if not self.redis_client:
-            return None
+        self, lookups: Dict[CacheKey, List[str]]
+    ) -> Tuple[Dict[CacheKey, Dict[str, any]], List[CacheKey]]:
+        """
+        Get features for many entities from the online cache in one round-trip
+
+        Returns:
+            Tuple of cached features and the cache keys that should be
+            refreshed early
+        """
+        if not self.online_cache or not lookups:
+            return {}, []
 
         try:
-            # Build cache keys
-            cache_keys = [
-                f"feature:{entity_type}:{entity_id}:{feature}" for feature in features
+            if not settings.SERVING_CACHE_EARLY_REFRESH:
+                return await self.online_cache.get_many(lookups), []
+
+            cached, ttls = await self.online_cache.get_many_with_ttl(lookups)
+            stale_keys = [
+                key
+                for key, ttl in ttls.items()
+                if key not in self._refreshing and self._should_refresh_early(ttl)
             ]
+            return cached, stale_keys
 
-            # Batch get from Redis
-            values = await self.redis_client.mget(cache_keys)
+        except Exception as e:
+            logger.warning(f"Cache retrieval error: {e}")
+            return {}, []
 
-            # Build result
-            result = {}
-            for feature, value in zip(features, values):
-                if value is not None:
-                    result[feature] = json.loads(value)
+    def _should_refresh_early(self, ttl_remaining: float) -> bool:
+        """
+        XFetch probabilistic early expiration
 
-            return result if result else None
+        An entry is refreshed with a probability that rises as its remaining
+        TTL approaches the time it takes to recompute it, so hot keys are
+        renewed before they expire instead of all missing at once.
+        """
+        if self._fetch_seconds <= 0:
+            return False
+
+        beta = settings.SERVING_CACHE_EARLY_REFRESH_BETA
+        return -self._fetch_seconds * beta * math.log(random.random()) >= ttl_remaining
 
+    def _schedule_refresh(
+        self, lookups: Dict[CacheKey, List[str]], feature_sets: List[FeatureSet]
+    ):
+        """Refresh cache entries in a background task"""
+        self._refreshing.update(lookups)
+        task = asyncio.create_task(self._refresh_features(lookups, feature_sets))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _refresh_features(
+        self, lookups: Dict[CacheKey, List[str]], feature_sets: List[FeatureSet]
+    ):
+        """Reload features from storage and write them back to the cache"""
+        try:
+            stored_features, _ = await self._load_features(lookups, feature_sets)
+            if stored_features:
+                self._queue_cache_writes(stored_features, extend_ttl=True)
         except Exception as e:
-            logger.warning(f"Cache retrieval error: {e}")
-            return None
+            logger.warning(f"Cache refresh error: {e}")
+        finally:
+            self._refreshing.difference_update(lookups)
 
-    async def _cache_features(
-        self, entity_id: str, entity_type: str, features: Dict[str, any]
+    def _queue_cache_writes(
+        self, entity_features: Dict[CacheKey, Dict[str, any]], extend_ttl: bool = False
     ):
-        """Cache features in Redis"""
-        if not self.redis_client:
+        """
+        Queue features for the background cache writer without waiting
+
+        Entries that do not fit in the bounded queue are dropped; the cache is
+        repopulated by a later miss.
+
+        Args:
+            entity_features: Cache key to feature values mapping
+            extend_ttl: Whether the write resets the TTL of existing entries;
+                only full refreshes do, writes of missed features do not
+        """
+        if not self._cache_writer:
             return
 
-        try:
-            # Prepare cache entries
-            pipe = self.redis_client.pipeline()
+        queued = 0
+        dropped = 0
+        for key, values in entity_features.items():
+            if not values:
+                continue
+            try:
+                self._cache_write_queue.put_nowait((key, values, extend_ttl))
+                queued += 1
+            except asyncio.QueueFull:
+                dropped += 1
+
+        if dropped:
+            logger.warning(f"Cache write queue full, dropped {dropped} entries")
+        feature_store_metrics.track_cache_writes("queued", queued)
+        feature_store_metrics.track_cache_writes("dropped", dropped)
+        feature_store_metrics.update_cache_write_queue_depth(
+            self._cache_write_queue.qsize()
+        )
+
+    async def _run_cache_writer(self):
+        """
+        Flush queued cache writes in pipelined batches
 
-            for feature_name, value in features.items():
-                cache_key = f"feature:{entity_type}:{entity_id}:{feature_name}"
-                pipe.setex(cache_key, self.cache_ttl, json.dumps(value))
+        Each flush takes everything queued (up to the batch size) since the
+        previous one, so writes from concurrent requests share a round-trip
+        (one per TTL mode).
+        """
+        queue = self._cache_write_queue
+        batch_size = settings.SERVING_CACHE_WRITE_BATCH_SIZE
+
+        while True:
+            # Batches by whether the writes extend existing TTLs
+            batches = {False: {}, True: {}}
+            key, values, extend_ttl = await queue.get()
+            batches[extend_ttl][key] = dict(values)
+            taken = 1
+            while taken < batch_size and not queue.empty():
+                key, values, extend_ttl = queue.get_nowait()
+                batches[extend_ttl].setdefault(key, {}).update(values)
+                taken += 1
 
-            await pipe.execute()
+            try:
+                flush_start = time.perf_counter()
+                for extend_ttl, batch in batches.items():
+                    if batch:
+                        await self.online_cache.set_many(batch, extend_ttl=extend_ttl)
+                self._record_stage("write_back", flush_start)
+                feature_store_metrics.track_cache_writes("flushed", taken)
+            except Exception as e:
+                logger.warning(f"Cache update error: {e}")
+                feature_store_metrics.track_cache_writes("error", taken)
+            finally:
+                for _ in range(taken):
+                    queue.task_done()
+                feature_store_metrics.update_cache_write_queue_depth(queue.qsize())
+
+    async def _load_features(
+        self,
+        lookups: Dict[CacheKey, List[str]],
+        feature_sets: List[FeatureSet],
+    ) -> Tuple[Dict[CacheKey, Dict[str, any]], Dict[CacheKey, Dict[str, any]]]:
+        """
+        Load cache misses from storage, coalescing concurrent loads
 
-        except Exception as e:
-            logger.warning(f"Cache update error: {e}")
+        Keys already being loaded by another request for a superset of the
+        needed features are awaited instead of fetched again, so a burst of
+        misses on a hot entity costs a single storage fetch.
+
+        Returns:
+            Tuple of features fetched by this request and features shared
+            from other in-flight loads
+        """
+        loop = asyncio.get_running_loop()
+        owned: Dict[CacheKey, List[str]] = {}
+        owned_futures: Dict[CacheKey, asyncio.Future] = {}
+        waiting: Dict[CacheKey, asyncio.Future] = {}
+
+        for key, names in lookups.items():
+            inflight = self._inflight_loads.get(key)
+            if inflight is not None and set(names) <= inflight[0]:
+                waiting[key] = inflight[1]
+            else:
+                owned[key] = names
+                owned_futures[key] = loop.create_future()
+                self._inflight_loads[key] = (set(names), owned_futures[key])
+
+        stored = {}
+        loaded = False
+        try:
+            if owned:
+                fetch_start = time.perf_counter()
+                stored = await self._get_stored_features(owned, feature_sets)
+                self._record_fetch_time(time.perf_counter() - fetch_start)
+            loaded = True
+        finally:
+            for key, future in owned_futures.items():
+                # Waiters fall back to their own fetch if this load failed
+                if not future.done():
+                    future.set_result(stored.get(key, {}) if loaded else None)
+                if self._inflight_loads.get(key, (None, None))[1] is future:
+                    del self._inflight_loads[key]
+
+        shared = {}
+        fallback = {}
+        if waiting:
+            results = await asyncio.gather(
+                *(asyncio.shield(future) for future in waiting.values())
+            )
+            for key, values in zip(waiting, results):
+                if values is None:
+                    fallback[key] = lookups[key]
+                    continue
+
+                requested = lookups[key]
+                shared_values = {
+                    name: value for name, value in values.items() if name in requested
+                }
+                if shared_values:
+                    shared[key] = shared_values
+
+        if fallback:
+            stored.update(await self._get_stored_features(fallback, feature_sets))
+
+        return stored, shared
+
+    def _record_fetch_time(self, seconds: float):
+        """Track an exponentially smoothed storage fetch time"""
+        if self._fetch_seconds <= 0:
+            self._fetch_seconds = seconds
+        else:
+            self._fetch_seconds = 0.8 * self._fetch_seconds + 0.2 * seconds
 
     async def _get_stored_features(
         self,
-        entity_id: str,
-        entity_type: str,
-        features: List[str],
+        lookups: Dict[CacheKey, List[str]],
         feature_sets: List[FeatureSet],
-    ) -> Dict[str, any]:
-        """Get features from storage"""
+    ) -> Dict[CacheKey, Dict[str, any]]:
+        """Get features for many entities from storage with set-based queries"""
         result = {}
-
-        # Get features from each feature set
-        for feature_set in feature_sets:
-            fs_features = await self.storage.get_features_for_entity(
-                feature_set_id=feature_set.id,
-                entity_id=entity_id,
-                entity_type=entity_type,
-                feature_names=features,
+        feature_sets_by_name = {fs.name: fs for fs in feature_sets}
+
+        # Group entity IDs so each feature set is queried once per entity type
+        batches: Dict[Tuple[str, str], List[str]] = {}
+        batch_features: Dict[Tuple[str, str], List[str]] = {}
+        for (entity_type, entity_id, fs_name), names in lookups.items():
+            batches.setdefault((fs_name, entity_type), []).append(entity_id)
+            requested = batch_features.setdefault((fs_name, entity_type), [])
+            requested.extend(name for name in names if name not in requested)
+
+        # Query feature sets concurrently, bounded by the database pool
+        batch_results = await asyncio.gather(
+            *(
+                self._fetch_feature_set(
+                    feature_sets_by_name[fs_name],
+                    entity_type,
+                    entity_ids,
+                    batch_features[(fs_name, entity_type)],
+                )
+                for (fs_name, entity_type), entity_ids in batches.items()
             )
+        )
 
-            for feature_name, value in fs_features.items():
-                if feature_name in features:
-                    result[feature_name] = value
+        for (fs_name, entity_type), fs_features in zip(batches, batch_results):
+            for entity_id, values in fs_features.items():
+                requested = lookups.get((entity_type, entity_id, fs_name), [])
+                entity_values = {
+                    name: value for name, value in values.items() if name in requested
+                }
+                if entity_values:
+                    result[(entity_type, entity_id, fs_name)] = entity_values
 
         return result
 
-    async def _get_feature_at_timestamp(
+    async def _fetch_feature_set(
         self,
-        entity_id: str,
-        feature_name: str,
-        timestamp: datetime,
+        feature_set: FeatureSet,
+        entity_type: str,
+        entity_ids: List[str],
+        feature_names: List[str],
+    ) -> Dict[str, Dict[str, any]]:
+        """Fetch one feature set's values for many entities, recording timing"""
+        async with self._storage_semaphore:
+            start_time = time.perf_counter()
+            success = False
+            try:
+                values = await self.storage.get_features_for_entities(
+                    feature_set_id=feature_set.id,
+                    entity_ids=entity_ids,
+                    entity_type=entity_type,
+                    feature_names=feature_names,
+                )
+                success = True
+                return values
+            finally:
+                feature_store_metrics.record_feature_set_fetch(
+                    feature_set.name, time.perf_counter() - start_time
+                )
+                feature_store_metrics.track_feature_retrieval(feature_set.name, success)
+
+    async def _point_in_time_join(
+        self,
+        entity_df: pd.DataFrame,
+        entity_column: str,
+        timestamp_column: str,
+        features: List[str],
         feature_sets: List[FeatureSet],
-    ) -> any:
-        """Get feature value at specific timestamp"""
-        # Find feature in feature sets
+    ) -> pd.DataFrame:
+        """
+        Attach point-in-time feature values with a backward as-of merge
+
+        Feature history is loaded once per feature set and each feature is
+        joined to all entity rows in a single vectorized merge_asof pass.
+        Rows without a timestamp get the feature defaults, like the offline
+        source.
+        """
+        row_count = len(entity_df)
+        lookup = pd.DataFrame(
+            {
+                "_row": range(row_count),
+                "entity_id": entity_df[entity_column].astype(str).to_numpy(),
+                "event_timestamp": _to_naive_utc(entity_df[timestamp_column]),
+            }
+        )
+        # merge_asof rejects null keys; these rows are filled by the reindex
+        lookup = lookup[lookup["event_timestamp"].notna()].sort_values(
+            "event_timestamp", kind="stable"
+        )
+
+        entity_ids = lookup["entity_id"].unique().tolist()
+        max_timestamp = lookup["event_timestamp"].max()
+        remaining = list(dict.fromkeys(features))
+
         for feature_set in feature_sets:
-            feature = await self.storage.get_feature_by_name(
-                feature_set_id=feature_set.id, feature_name=feature_name
-            )
+            if not remaining:
+                break
 
-            if feature:
-                # Get historical value
-                value = await self.storage.get_feature_value_at_timestamp(
-                    feature_id=feature.id, entity_id=entity_id, timestamp=timestamp
+            fs_features = await self.storage.get_features_by_names(
+                feature_set_id=feature_set.id, feature_names=remaining
+            )
+            if not fs_features:
+                continue
+
+            history_by_feature = {}
+            if entity_ids:
+                history = await self.storage.get_feature_value_history(
+                    feature_set_id=feature_set.id,
+                    feature_names=[f.name for f in fs_features],
+                    entity_ids=entity_ids,
+                    end_timestamp=max_timestamp.to_pydatetime(),
                 )
+                history["event_timestamp"] = _to_naive_utc(history["event_timestamp"])
+                history = history.sort_values("event_timestamp", kind="stable")
+                history_by_feature = dict(tuple(history.groupby("feature_name")))
+
+            for feature in fs_features:
+                feature_history = history_by_feature.get(feature.name)
+
+                if feature_history is not None:
+                    merged = pd.merge_asof(
+                        lookup,
+                        feature_history[["entity_id", "event_timestamp", "value"]],
+                        on="event_timestamp",
+                        by="entity_id",
+                        direction="backward",
+                    )
+                    values = (
+                        merged.set_index("_row")["value"]
+                        .reindex(range(row_count))
+                        .astype(object)
+                    )
+                else:
+                    values = pd.Series([None] * row_count, dtype=object)
+
+                entity_df[feature.name] = _fill_missing(
+                    values, feature.default_value
+                ).to_numpy()
+                remaining.remove(feature.name)
+
+        # Features not defined in any feature set resolve to None
+        for feature_name in remaining:
+            entity_df[feature_name] = None
+
+        return entity_df
+
+    async def _offline_point_in_time_join(
+        self,
+        entity_df: pd.DataFrame,
+        entity_column: str,
+        timestamp_column: str,
+        features: List[str],
+        feature_sets: List[FeatureSet],
+    ) -> pd.DataFrame:
+        """Attach point-in-time feature values with a DuckDB ASOF JOIN"""
+        remaining = list(dict.fromkeys(features))
+        feature_requests = []
+        defaults = {}
 
-                if value is not None:
-                    return value
-                elif feature.default_value is not None:
-                    return feature.default_value
+        for feature_set in feature_sets:
+            if not remaining:
+                break
 
-        return None
+            fs_features = await self.storage.get_features_by_names(
+                feature_set_id=feature_set.id, feature_names=remaining
+            )
+            if not fs_features:
+                continue
+
+            feature_requests.append((feature_set, [f.name for f in fs_features]))
+            for feature in fs_features:
+                defaults[feature.name] = feature.default_value
+                remaining.remove(feature.name)
+
+        lookup = pd.DataFrame(
+            {
+                entity_column: entity_df[entity_column].to_numpy(),
+                timestamp_column: _to_naive_utc(entity_df[timestamp_column]),
+            }
+        )
+        table = await self.storage.get_historical_features_offline(
+            entity_df=lookup,
+            feature_requests=feature_requests,
+            entity_column=entity_column,
+            timestamp_column=timestamp_column,
+        )
+
+        for feature_name, default_value in defaults.items():
+            values = table.column(feature_name).to_pandas(integer_object_nulls=True)
+            entity_df[feature_name] = _fill_missing(
+                values.astype(object), default_value
+            ).to_numpy()
+
+        # Features not defined in any feature set resolve to None
+        for feature_name in remaining:
+            entity_df[feature_name] = None
+
+        return entity_df
+
+
+def _to_naive_utc(timestamps: pd.Series) -> pd.Series:
+    """Normalize timestamps to naive UTC datetime64[ns] for as-of joins"""
+    timestamps = pd.to_datetime(timestamps, utc=True)
+    return timestamps.dt.tz_localize(None).astype("datetime64[ns]")
+
+
+def _fill_missing(values: pd.Series, default_value: any) -> pd.Series:
+    """Replace missing values with the feature default (or None)"""
+    mask = values.isna()
+    if not mask.any():
+        return values
+
+    values = values.astype(object)
+    fill = [default_value] * int(mask.sum())
+    values.loc[mask] = pd.Series(fill, index=values.index[mask], dtype=object)
+    return values
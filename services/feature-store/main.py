@@ -12,7 +12,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from api.routes import feature_sets, features, health, monitoring, serving
 from core.config import settings
-from core.database import init_db
+from core.database import close_db, init_db
 from core.logging import setup_logging
 from core.metrics import create_metrics_response
 
@@ -87,6 +87,7 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down Feature Store 2.0...")
     await serving_engine.stop()
     await storage.close()
+    await close_db()
 
 
 # Create FastAPI app
@@ -70,6 +70,7 @@ class FeatureSet(Base):
     # Statistics and monitoring
     statistics = Column(JSON, default=dict)
     last_materialization = Column(DateTime)
+    materialization_watermark = Column(DateTime)  # latest materialized event time
     row_count = Column(Integer, default=0)
     size_bytes = Column(Integer, default=0)
 
@@ -119,6 +120,11 @@ class FeatureSet(Base):
                 if self.last_materialization
                 else None
             ),
+            "materialization_watermark": (
+                self.materialization_watermark.isoformat()
+                if self.materialization_watermark
+                else None
+            ),
             "row_count": self.row_count,
             "size_bytes": self.size_bytes,
             "status": self.status.value if self.status else None,
@@ -3,7 +3,7 @@ Serving request models for Feature Store
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -18,6 +18,17 @@ class ServingRequest(BaseModel):
     features: Optional[List[str]] = Field(
         None, description="Specific features to retrieve"
     )
+    timeout_ms: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Time budget in milliseconds; features unresolved at the "
+        "deadline are served with their default value",
+    )
+    response_format: str = Field(
+        "rows",
+        description="Features payload shape: rows (entity to features mapping) "
+        "or columnar (feature names once, one value row per entity)",
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -25,6 +36,7 @@ class ServingRequest(BaseModel):
                 "feature_sets": ["user_profile", "user_activity"],
                 "entities": {"user": ["user_123", "user_456"]},
                 "features": ["age", "total_purchases", "last_login"],
+                "timeout_ms": 50,
             }
         }
     )
@@ -41,6 +53,9 @@ class PointInTimeRequest(BaseModel):
     timestamp_column: str = Field(
         "event_timestamp", description="Timestamp column name"
     )
+    source: str = Field(
+        "database", description="History source: database or offline (parquet)"
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -55,6 +70,34 @@ class PointInTimeRequest(BaseModel):
                 },
                 "features": ["age", "total_purchases"],
                 "timestamp_column": "event_timestamp",
+                "source": "database",
+            }
+        }
+    )
+
+
+class OfflineReadRequest(BaseModel):
+    """Request model for streaming offline feature reads"""
+
+    feature_set: str = Field(..., description="Feature set name")
+    features: Optional[List[str]] = Field(None, description="Specific features to read")
+    entity_ids: Optional[List[str]] = Field(
+        None, description="Entity IDs to read, all if omitted"
+    )
+    start_date: Optional[datetime] = Field(None, description="Start date filter")
+    end_date: Optional[datetime] = Field(None, description="End date filter")
+    batch_size: Optional[int] = Field(
+        None, gt=0, description="Rows per streamed record batch"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "feature_set": "user_profile",
+                "features": ["age", "total_purchases"],
+                "entity_ids": ["user_123", "user_456"],
+                "start_date": "2024-01-01T00:00:00",
+                "end_date": "2024-01-31T23:59:59",
             }
         }
     )
@@ -90,11 +133,23 @@ class BatchServingRequest(BaseModel):
     )
 
 
+class ColumnarFeatures(BaseModel):
+    """Features payload of the columnar response format"""
+
+    entity_ids: List[str] = Field(..., description="Entity IDs, one per row")
+    feature_names: List[str] = Field(..., description="Feature names, one per column")
+    values: List[List[Any]] = Field(
+        ..., description="Feature values per entity, in feature name order"
+    )
+
+
 class FeatureServingResponse(BaseModel):
     """Response model for feature serving"""
 
-    features: Dict[str, Dict[str, Any]] = Field(
-        ..., description="Entity ID to features mapping"
+    features: Union[Dict[str, Dict[str, Any]], ColumnarFeatures] = Field(
+        ...,
+        description="Entity ID to features mapping, or columnar features with "
+        "the columnar response format",
     )
     metadata: Dict = Field(default_factory=dict, description="Response metadata")
 
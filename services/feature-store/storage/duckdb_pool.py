@@ -0,0 +1,102 @@
+"""
+DuckDB cursor pool for running offline queries off the event loop
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, TypeVar
+
+import duckdb
+
+T = TypeVar("T")
+
+
+class DuckDBCursorPool:
+    """
+    Fixed-size pool of DuckDB cursors, each bound to one worker thread
+
+    DuckDB connections must not be shared between threads, but cursors on
+    the same database can run queries in parallel. Every worker thread of
+    the pool lazily opens its own cursor, and callers queue for a free worker
+    instead of blocking the event loop. Long-running streamed reads take a
+    dedicated cursor outside the workers, limited to ``max_streams`` at once,
+    so slow stream consumers never hold up catalog lookups or writes.
+    """
+
+    def __init__(
+        self, conn: duckdb.DuckDBPyConnection, size: int, max_streams: int = 1
+    ):
+        self.conn = conn
+        self.size = size
+        self._executor = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix="duckdb"
+        )
+        self._local = threading.local()
+        self._streams = threading.BoundedSemaphore(max_streams)
+        self._cursors: List[duckdb.DuckDBPyConnection] = []
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run ``func(cursor, *args, **kwargs)`` on a pooled cursor
+
+        Returns:
+            The function's result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: func(self._cursor(), *args, **kwargs)
+        )
+
+    @contextmanager
+    def dedicated_cursor(
+        self, timeout: Optional[float] = None
+    ) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Hold a stream slot with a cursor of its own, closed on exit
+
+        For queries consumed over a long time, such as streamed reads, which
+        must not tie up a pool worker. Blocks until a stream slot is free, so
+        call it from a worker thread.
+
+        Raises:
+            TimeoutError: No stream slot became free within timeout seconds
+        """
+        if not self._streams.acquire(timeout=timeout):
+            raise TimeoutError("All DuckDB stream slots are busy")
+        try:
+            cursor = self.conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+        finally:
+            self._streams.release()
+
+    async def execute(
+        self, query: str, params: Optional[List[Any]] = None
+    ) -> List[tuple]:
+        """Run a query on a pooled cursor and fetch all rows"""
+        return await self.run(
+            lambda cursor: cursor.execute(query, params or []).fetchall()
+        )
+
+    def close(self):
+        """Stop the worker threads and close their cursors"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for cursor in self._cursors:
+                cursor.close()
+            self._cursors.clear()
+
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        """Cursor of the current worker thread"""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self.conn.cursor()
+            self._local.cursor = cursor
+            with self._lock:
+                self._cursors.append(cursor)
+        return cursor
@@ -3,25 +3,70 @@ Feature storage layer for Feature Store
 Handles offline and online storage of features
 """
 
+import asyncio
+import json
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from uuid import uuid4
 
 import boto3
 import duckdb
 import pandas as pd
 import pyarrow as pa
+import pyarrow.fs as pafs
 import pyarrow.parquet as pq
-from sqlalchemy import and_, desc
+import redis.asyncio as redis
+from sqlalchemy import and_, desc, func, or_, select, text, update
+from sqlalchemy.orm import aliased, selectinload
+from storage.duckdb_pool import DuckDBCursorPool
 
+from core.arrow_ipc import is_missing
 from core.config import settings
-from core.database import get_db
+from core.database import AsyncSessionLocal, async_engine
+from core.metadata_cache import metadata_cache
+from core.online_cache import OnlineCache
 from models.feature import Feature
 from models.feature_set import FeatureSet
 from models.feature_value import FeatureValue
 
 logger = logging.getLogger(__name__)
 
+# DuckDB catalog of offline data files, one view per feature set on top
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feature_set_files (
+    feature_set VARCHAR,
+    path VARCHAR,
+    event_date VARCHAR,
+    size_bytes BIGINT
+);
+CREATE TABLE IF NOT EXISTS feature_set_catalog (
+    feature_set VARCHAR PRIMARY KEY,
+    refreshed_at TIMESTAMP
+);
+"""
+
+# Entity filter relation name on dedicated streaming cursors
+ENTITY_RELATION = "entity_ids"
+
+# Hive partition column of the offline store layout
+PARTITION_COLUMN = "event_date"
+# Partition of rows without an event timestamp
+NULL_PARTITION = "__null__"
+
+# Start of the first incremental materialization window
+MATERIALIZATION_EPOCH = datetime(1970, 1, 1)
+
+# Materialized columns that are not feature values
+ONLINE_RESERVED_COLUMNS = {
+    "entity_id",
+    "id",
+    "entity_type",
+    "event_timestamp",
+    "created_timestamp",
+}
+
 
 class FeatureStorage:
     """Manages feature storage in offline and online stores"""
@@ -30,7 +75,13 @@ class FeatureStorage:
         self.offline_store = None
         self.online_store = None
         self.s3_client = None
+        self.s3_filesystem = None
         self.duckdb_conn = None
+        self.duckdb_pool: Optional[DuckDBCursorPool] = None
+        self._compaction_locks: Dict[str, asyncio.Lock] = {}
+        # Catalog entries of a feature set are replaced by one writer at a time
+        self._catalog_locks: Dict[str, asyncio.Lock] = {}
+        self._compaction_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
         """Initialize storage backends"""
@@ -50,11 +101,21 @@ class FeatureStorage:
             except Exception:
                 self.s3_client.create_bucket(Bucket=settings.S3_BUCKET)
 
+            # Arrow filesystem for streaming multipart parquet uploads
+            self.s3_filesystem = pafs.S3FileSystem(
+                access_key=settings.S3_ACCESS_KEY,
+                secret_key=settings.S3_SECRET_KEY,
+                endpoint_override=settings.S3_ENDPOINT.replace("http://", "").replace(
+                    "https://", ""
+                ),
+                scheme="https" if settings.S3_USE_SSL else "http",
+            )
+
             logger.info(f"Initialized S3 storage with bucket: {settings.S3_BUCKET}")
 
         # Initialize compute engine (DuckDB)
         if settings.COMPUTE_ENGINE == "duckdb":
-            self.duckdb_conn = duckdb.connect(":memory:")
+            self.duckdb_conn = self._open_duckdb()
             # Install and load httpfs for S3 access (with fallback for ARM64)
             try:
                 self.duckdb_conn.execute("INSTALL httpfs;")
@@ -83,70 +144,124 @@ class FeatureStorage:
                     logger.warning(f"Could not configure S3 for DuckDB: {e}")
                     logger.info("DuckDB will use boto3 for S3 operations")
 
+            # Cache parquet footers across queries and keep the file catalog
+            self.duckdb_conn.execute("SET enable_object_cache=true")
+            self.duckdb_conn.execute(CATALOG_SCHEMA)
+
+            # Offline queries run on pooled cursors off the event loop
+            self.duckdb_pool = DuckDBCursorPool(
+                self.duckdb_conn,
+                settings.MAX_COMPUTE_THREADS,
+                max_streams=settings.DUCKDB_MAX_STREAMS,
+            )
+
             logger.info("Initialized DuckDB compute engine")
 
+        # Initialize online store (Redis), shared key layout with serving
+        if settings.ONLINE_STORE_ENABLED:
+            try:
+                client = redis.from_url(
+                    settings.REDIS_URL, max_connections=settings.REDIS_MAX_CONNECTIONS
+                )
+                await client.ping()
+                self.online_store = OnlineCache.from_settings(client)
+                logger.info("Initialized Redis online store")
+            except Exception as e:
+                logger.warning(f"Could not connect to online store: {e}")
+                self.online_store = None
+
+        # Start background offline compaction
+        if settings.COMPACTION_ENABLED and self.duckdb_pool:
+            self._compaction_task = asyncio.create_task(self.run_compaction_job())
+
+    def _open_duckdb(self) -> duckdb.DuckDBPyConnection:
+        """
+        Open the persistent DuckDB database
+
+        Falls back to an in-memory database if the file is unavailable, for
+        instance while another process holds its lock.
+        """
+        path = settings.DUCKDB_DATABASE_PATH
+        if path != ":memory:":
+            try:
+                import os
+
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                return duckdb.connect(path)
+            except (duckdb.IOException, OSError) as e:
+                logger.warning(
+                    f"Could not open DuckDB database {path}: {e}. "
+                    "Using an in-memory catalog"
+                )
+        return duckdb.connect(":memory:")
+
     async def close(self):
         """Close storage connections"""
+        if self._compaction_task:
+            self._compaction_task.cancel()
+        if self.duckdb_pool:
+            self.duckdb_pool.close()
         if self.duckdb_conn:
             self.duckdb_conn.close()
+        if self.online_store:
+            await self.online_store.client.close()
 
     async def write_feature_values(
         self,
         feature_set: FeatureSet,
         feature_values: pd.DataFrame,
         mode: str = "append",
+        file_name: Optional[str] = None,
+        watermark: Optional[datetime] = None,
     ) -> str:
         """
         Write feature values to offline store
 
+        Rows are written to Hive-style partitions by the UTC date of their
+        event timestamp (``data/event_date=YYYY-MM-DD/<file>.parquet``), so
+        date-bounded reads only open the partitions they need.
+
         Args:
             feature_set: Feature set to write to
             feature_values: DataFrame with feature values
             mode: Write mode - append or overwrite
+            file_name: Optional deterministic file name, replaced if it exists
+            watermark: Optional materialization watermark to advance to
 
         Returns:
-            Path to written data
+            Path to the feature set's data directory
         """
         try:
             # Generate storage path
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            path = f"feature_sets/{feature_set.name}/data/{timestamp}.parquet"
-
-            if settings.STORAGE_BACKEND == "s3":
-                # Convert to parquet and upload to S3
-                table = pa.Table.from_pandas(feature_values)
-
-                # Write to buffer
-                import io
-
-                buffer = io.BytesIO()
-                pq.write_table(table, buffer)
-                buffer.seek(0)
-
-                # Upload to S3
-                s3_key = path
-                self.s3_client.put_object(
-                    Bucket=settings.S3_BUCKET,
-                    Key=s3_key,
-                    Body=buffer.getvalue(),
+            if not file_name:
+                file_name = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+            data_path = f"feature_sets/{feature_set.name}/data"
+
+            written = []
+            for partition, partition_values in _partition_by_event_date(feature_values):
+                partition_path = f"{data_path}/{partition}" if partition else data_path
+                # Encoding and upload are blocking, keep them off the event loop
+                written.append(
+                    await asyncio.to_thread(
+                        self._write_parquet,
+                        f"{partition_path}/{file_name}.parquet",
+                        partition_values,
+                    )
                 )
 
-                full_path = f"s3://{settings.S3_BUCKET}/{s3_key}"
-
+            if settings.STORAGE_BACKEND == "s3":
+                full_path = f"s3://{settings.S3_BUCKET}/{data_path}"
             else:
-                # Local file storage
-                local_path = f"{settings.STORAGE_PATH}/{path}"
-                import os
-
-                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                full_path = f"{settings.STORAGE_PATH}/{data_path}"
 
-                feature_values.to_parquet(local_path)
-                full_path = local_path
+            await self._add_catalog_files(feature_set, written)
 
             logger.info(f"Wrote {len(feature_values)} rows to {full_path}")
 
             # Update feature set metadata
-            await self._update_feature_set_stats(feature_set, len(feature_values))
+            await self._update_feature_set_stats(
+                feature_set, len(feature_values), watermark=watermark
+            )
 
             return full_path
 
@@ -154,6 +269,59 @@ class FeatureStorage:
             logger.error(f"Error writing feature values: {e}")
             raise
 
+    def _write_parquet(
+        self,
+        path: str,
+        data: Union[pd.DataFrame, pa.Table, pa.RecordBatchReader],
+        row_group_size: Optional[int] = None,
+    ) -> Tuple[str, int]:
+        """
+        Write data as a parquet file relative to the storage root
+
+        The file only becomes visible once it is complete. On S3 the parquet
+        writer streams into a multipart upload, so no serialized copy of the
+        file is held in memory. A record batch reader is written batch by
+        batch and never materialized as a whole.
+
+        Returns:
+            Full path of the written file and its size in bytes
+        """
+        if isinstance(data, pd.DataFrame):
+            data = pa.Table.from_pandas(data, preserve_index=False)
+
+        def write(where: str, filesystem=None):
+            if isinstance(data, pa.Table):
+                pq.write_table(
+                    data, where, filesystem=filesystem, row_group_size=row_group_size
+                )
+                return
+            with pq.ParquetWriter(where, data.schema, filesystem=filesystem) as writer:
+                for batch in data:
+                    writer.write_batch(batch, row_group_size=row_group_size)
+
+        if settings.STORAGE_BACKEND == "s3":
+            write(f"{settings.S3_BUCKET}/{path}", self.s3_filesystem)
+            size = self.s3_filesystem.get_file_info(f"{settings.S3_BUCKET}/{path}").size
+            return f"s3://{settings.S3_BUCKET}/{path}", size
+
+        else:
+            # Local file storage
+            local_path = f"{settings.STORAGE_PATH}/{path}"
+            import os
+
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+
+            # Write next to the target and rename into place
+            temp_path = f"{local_path}.{uuid4().hex}.tmp"
+            try:
+                write(temp_path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            os.replace(temp_path, local_path)
+            return local_path, os.path.getsize(local_path)
+
     async def read_feature_values(
         self,
         feature_set: FeatureSet,
@@ -176,52 +344,28 @@ class FeatureStorage:
             DataFrame with feature values
         """
         try:
-            # Get data files for feature set
-            data_files = await self._list_feature_set_files(feature_set)
-
-            if not data_files:
-                return pd.DataFrame()
-
             # Build query
             if settings.COMPUTE_ENGINE == "duckdb":
-                # Create view from parquet files
-                if settings.STORAGE_BACKEND == "s3":
-                    file_pattern = (
-                        f"s3://{settings.S3_BUCKET}/feature_sets/"
-                        f"{feature_set.name}/data/*.parquet"
-                    )
-                else:
-                    file_pattern = (
-                        f"{settings.STORAGE_PATH}/feature_sets/"
-                        f"{feature_set.name}/data/*.parquet"
-                    )
-
-                query = f"SELECT * FROM read_parquet('{file_pattern}')"
-
-                # Add filters
-                filters = []
-                if entity_ids:
-                    entity_filter = " OR ".join(
-                        [f"entity_id = '{eid}'" for eid in entity_ids]
-                    )
-                    filters.append(f"({entity_filter})")
-
-                if start_date:
-                    filters.append(f"event_timestamp >= '{start_date.isoformat()}'")
-
-                if end_date:
-                    filters.append(f"event_timestamp <= '{end_date.isoformat()}'")
+                # Data files for feature set, pruned to the date range
+                source = await self._offline_source(
+                    feature_set, start_date=start_date, end_date=end_date
+                )
 
-                if filters:
-                    query += " WHERE " + " AND ".join(filters)
+                if not source:
+                    return pd.DataFrame()
 
-                # Select specific features
-                if features:
-                    columns = ["entity_id", "event_timestamp"] + features
-                    query = query.replace("SELECT *", f"SELECT {', '.join(columns)}")
+                query, params = _feature_values_query(
+                    source,
+                    features=features,
+                    entity_relation=ENTITY_RELATION if entity_ids else None,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
 
                 # Execute query
-                result_df = self.duckdb_conn.execute(query).df()
+                result_df = await self.duckdb_pool.run(
+                    _fetch_df, query, params, entity_ids=entity_ids
+                )
 
                 return result_df
 
@@ -229,14 +373,187 @@ class FeatureStorage:
             logger.error(f"Error reading feature values: {e}")
             raise
 
+    async def stream_feature_values(
+        self,
+        feature_set: FeatureSet,
+        features: Optional[List[str]] = None,
+        entity_ids: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Stream feature values from offline store as Arrow record batches
+
+        Takes the same filters as read_feature_values, but the result is
+        fetched from DuckDB batch by batch, so reads of any size run in
+        bounded memory. The returned iterator is synchronous and runs the
+        query on its own DuckDB cursor, so it can be consumed from a worker
+        thread. The query counts against the cursor pool's concurrency limit
+        until the iterator is exhausted or closed.
+
+        Args:
+            batch_size: Rows per record batch, defaults to
+                MATERIALIZATION_BATCH_SIZE
+
+        Returns:
+            Iterator of record batches
+        """
+        if settings.COMPUTE_ENGINE != "duckdb":
+            raise ValueError("Streaming reads require the DuckDB compute engine")
+
+        source = await self._offline_source(
+            feature_set, start_date=start_date, end_date=end_date
+        )
+        if not source:
+            return iter(())
+
+        query, params = _feature_values_query(
+            source,
+            features=features,
+            entity_relation=ENTITY_RELATION if entity_ids else None,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        return self._iter_record_batches(
+            query,
+            params,
+            entity_ids=entity_ids,
+            batch_size=batch_size or settings.MATERIALIZATION_BATCH_SIZE,
+        )
+
+    def _iter_record_batches(
+        self,
+        query: str,
+        params: List[Any],
+        entity_ids: Optional[List[str]],
+        batch_size: int,
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Run a query on a dedicated pool cursor and yield its record batches
+
+        An empty result yields one empty batch, so it keeps its schema.
+        """
+        with self.duckdb_pool.dedicated_cursor(
+            timeout=settings.DUCKDB_STREAM_WAIT_SECONDS
+        ) as cursor:
+            with _entity_relation(cursor, entity_ids, name=ENTITY_RELATION):
+                reader = cursor.execute(query, params).fetch_record_batch(batch_size)
+                empty = True
+                for batch in reader:
+                    empty = False
+                    yield batch
+                if empty:
+                    yield pa.RecordBatch.from_pylist([], schema=reader.schema)
+
+    async def get_historical_features_offline(
+        self,
+        entity_df: pd.DataFrame,
+        feature_requests: List[Tuple[FeatureSet, List[str]]],
+        entity_column: str = "entity_id",
+        timestamp_column: str = "event_timestamp",
+    ) -> pa.Table:
+        """
+        Point-in-time join entity rows against the offline parquet store
+
+        The entity dataframe is registered as a DuckDB relation and joined to
+        each feature set's parquet files with a backward ASOF JOIN, so the
+        whole training set is produced by a single DuckDB scan.
+
+        Args:
+            entity_df: DataFrame with entity IDs and naive UTC timestamps
+            feature_requests: Feature sets paired with the features to read
+            entity_column: Name of the entity ID column in entity_df
+            timestamp_column: Name of the timestamp column in entity_df
+
+        Returns:
+            Arrow table with one column per requested feature, aligned with
+            the rows of entity_df
+        """
+        if settings.COMPUTE_ENGINE != "duckdb":
+            raise ValueError("Offline retrieval requires the DuckDB compute engine")
+
+        relation_name = f"entity_df_{uuid4().hex}"
+        lookup = pd.DataFrame(
+            {
+                "__row": range(len(entity_df)),
+                "__entity_id": entity_df[entity_column].astype(str).to_numpy(),
+                "__event_timestamp": entity_df[timestamp_column].to_numpy(),
+            }
+        )
+
+        select_columns = []
+        joins = []
+
+        # Partitions after the latest entity timestamp can never match
+        latest = lookup["__event_timestamp"].max() if len(lookup) else None
+        end_date = latest.to_pydatetime() if pd.notna(latest) else None
+
+        for index, (feature_set, features) in enumerate(feature_requests):
+            data_files = await self._list_feature_set_files(
+                feature_set, end_date=end_date
+            )
+            source = _parquet_source(data_files)
+
+            available = set()
+            if data_files:
+                available = {
+                    row[0]
+                    for row in await self.duckdb_pool.execute(
+                        f"DESCRIBE SELECT * FROM {source}"
+                    )
+                }
+
+            alias = f"f{index}"
+            columns = [name for name in features if name in available]
+
+            for name in features:
+                if name in available:
+                    select_columns.append(f"{alias}.{_quote_identifier(name)}")
+                else:
+                    select_columns.append(f"NULL AS {_quote_identifier(name)}")
+
+            if not columns:
+                continue
+
+            projection = ", ".join(
+                ["entity_id", "CAST(event_timestamp AS TIMESTAMP) AS event_timestamp"]
+                + [_quote_identifier(name) for name in columns]
+            )
+            joins.append(
+                f"ASOF LEFT JOIN (SELECT {projection} FROM {source}) {alias} "
+                f"ON e.__entity_id = {alias}.entity_id "
+                f"AND e.__event_timestamp >= {alias}.event_timestamp"
+            )
+
+        if not select_columns:
+            return pa.table({})
+
+        query = (
+            f"SELECT {', '.join(select_columns)} FROM {relation_name} e "
+            f"{' '.join(joins)} ORDER BY e.__row"
+        )
+
+        return await self.duckdb_pool.run(_fetch_arrow, query, relation_name, lookup)
+
     async def get_feature_set_by_name(self, name: str) -> Optional[FeatureSet]:
-        """Get feature set by name"""
-        db = next(get_db())
-        try:
-            feature_set = db.query(FeatureSet).filter(FeatureSet.name == name).first()
-            return feature_set
-        finally:
-            db.close()
+        """Get feature set by name, with its features loaded"""
+        if settings.METADATA_CACHE_ENABLED:
+            feature_set = metadata_cache.get_feature_set(name)
+            if feature_set is not None:
+                return feature_set
+
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(FeatureSet)
+                .options(selectinload(FeatureSet.features))
+                .where(FeatureSet.name == name)
+            )
+            feature_set = result.scalars().first()
+
+        if feature_set is not None and settings.METADATA_CACHE_ENABLED:
+            metadata_cache.put_feature_set(feature_set)
+        return feature_set
 
     async def get_features_for_entity(
         self,
@@ -246,77 +563,247 @@ class FeatureStorage:
         feature_names: List[str],
     ) -> Dict[str, any]:
         """Get latest feature values for an entity"""
-        db = next(get_db())
-        try:
-            # Get features from database
-            features = (
-                db.query(Feature)
-                .filter(
-                    and_(
-                        Feature.feature_set_id == feature_set_id,
-                        Feature.name.in_(feature_names),
-                    )
-                )
-                .all()
-            )
+        result = await self.get_features_for_entities(
+            feature_set_id=feature_set_id,
+            entity_ids=[entity_id],
+            entity_type=entity_type,
+            feature_names=feature_names,
+        )
+        return result.get(entity_id, {})
+
+    async def get_features_for_entities(
+        self,
+        feature_set_id: str,
+        entity_ids: List[str],
+        entity_type: str,
+        feature_names: List[str],
+    ) -> Dict[str, Dict[str, any]]:
+        """Get latest feature values for many entities, omitting unset features"""
+        latest_values = await self.get_latest_feature_values(
+            feature_set_id=feature_set_id,
+            entity_ids=entity_ids,
+            entity_type=entity_type,
+            feature_names=feature_names,
+        )
+
+        result = {}
+        for entity_id, values in latest_values.items():
+            entity_values = {
+                name: value for name, value in values.items() if value is not None
+            }
+            if entity_values:
+                result[entity_id] = entity_values
 
-            result = {}
+        return result
 
-            for feature in features:
-                # Get latest value for this feature
-                value_record = (
-                    db.query(FeatureValue)
-                    .filter(
-                        and_(
-                            FeatureValue.feature_id == feature.id,
-                            FeatureValue.entity_id == entity_id,
-                            FeatureValue.entity_type == entity_type,
-                        )
-                    )
-                    .order_by(desc(FeatureValue.event_timestamp))
-                    .first()
+    async def get_latest_feature_values(
+        self,
+        feature_set_id: str,
+        entity_ids: List[str],
+        entity_type: str,
+        feature_names: List[str],
+    ) -> Dict[str, Dict[str, any]]:
+        """
+        Get the latest value of every requested feature for many entities
+
+        Runs a single statement: a row_number() window over
+        idx_feature_value_lookup picks the newest value per (feature, entity)
+        and is outer-joined to the feature definitions so defaults come back
+        in the same round-trip.
+
+        Args:
+            feature_set_id: Feature set the features belong to
+            entity_ids: Entity IDs to look up
+            entity_type: Entity type of the IDs
+            feature_names: Feature names to retrieve
+
+        Returns:
+            Dense entity ID to feature name to value mapping; features without
+            a stored value hold their default value or None
+        """
+        if not entity_ids or not feature_names:
+            return {}
+
+        requested_features = select(Feature.id).where(
+            and_(
+                Feature.feature_set_id == feature_set_id,
+                Feature.name.in_(feature_names),
+            )
+        )
+
+        ranked_values = (
+            select(
+                FeatureValue,
+                func.row_number()
+                .over(
+                    partition_by=(FeatureValue.feature_id, FeatureValue.entity_id),
+                    order_by=desc(FeatureValue.event_timestamp),
+                )
+                .label("row_number"),
+            )
+            .where(
+                and_(
+                    FeatureValue.feature_id.in_(requested_features),
+                    FeatureValue.entity_id.in_(entity_ids),
+                    FeatureValue.entity_type == entity_type,
                 )
+            )
+            .subquery()
+        )
+        latest_value = aliased(FeatureValue, ranked_values)
+
+        statement = (
+            select(Feature.name, Feature.default_value, latest_value)
+            .outerjoin(
+                latest_value,
+                and_(
+                    latest_value.feature_id == Feature.id,
+                    ranked_values.c.row_number == 1,
+                ),
+            )
+            .where(
+                and_(
+                    Feature.feature_set_id == feature_set_id,
+                    Feature.name.in_(feature_names),
+                )
+            )
+        )
+
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(statement)).all()
 
-                if value_record:
-                    result[feature.name] = value_record.get_value()
-                elif feature.default_value is not None:
-                    result[feature.name] = feature.default_value
+        defaults = {name: default_value for name, default_value, _ in rows}
+        result = {entity_id: dict(defaults) for entity_id in entity_ids}
 
-            return result
+        for feature_name, _, value_record in rows:
+            if value_record is not None and value_record.entity_id in result:
+                value = value_record.get_value()
+                if value is not None:
+                    result[value_record.entity_id][feature_name] = value
 
-        finally:
-            db.close()
+        return result
 
     async def get_feature_by_name(
         self, feature_set_id: str, feature_name: str
     ) -> Optional[Feature]:
         """Get feature by name within a feature set"""
-        db = next(get_db())
-        try:
-            feature = (
-                db.query(Feature)
-                .filter(
+        if settings.METADATA_CACHE_ENABLED:
+            cached = metadata_cache.get_features(feature_set_id, [feature_name])
+            if cached is not None:
+                return cached[0] if cached else None
+
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Feature).where(
                     and_(
                         Feature.feature_set_id == feature_set_id,
                         Feature.name == feature_name,
                     )
                 )
-                .first()
             )
-            return feature
-        finally:
-            db.close()
+            return result.scalars().first()
+
+    async def get_features_by_names(
+        self, feature_set_id: str, feature_names: List[str]
+    ) -> List[Feature]:
+        """Get features by name within a feature set"""
+        if settings.METADATA_CACHE_ENABLED:
+            cached = metadata_cache.get_features(feature_set_id, feature_names)
+            if cached is not None:
+                return cached
+
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Feature).where(
+                    and_(
+                        Feature.feature_set_id == feature_set_id,
+                        Feature.name.in_(feature_names),
+                    )
+                )
+            )
+            return result.scalars().all()
+
+    async def get_feature_value_history(
+        self,
+        feature_set_id: str,
+        feature_names: List[str],
+        entity_ids: List[str],
+        end_timestamp: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        Load the value history of features for many entities
+
+        Args:
+            feature_set_id: Feature set the features belong to
+            feature_names: Feature names to load
+            entity_ids: Entity IDs to load values for
+            end_timestamp: Optional upper bound on event timestamps
+
+        Returns:
+            DataFrame with feature_name, entity_id, event_timestamp and value
+            columns
+        """
+        columns = {
+            "feature_name": [],
+            "entity_id": [],
+            "event_timestamp": [],
+            "value": [],
+        }
+
+        async with AsyncSessionLocal() as session:
+            batch_size = settings.SERVING_BATCH_SIZE
+            for start in range(0, len(entity_ids), batch_size):
+                statement = (
+                    select(
+                        Feature.name,
+                        FeatureValue.entity_id,
+                        FeatureValue.event_timestamp,
+                        FeatureValue.value_int,
+                        FeatureValue.value_float,
+                        FeatureValue.value_string,
+                        FeatureValue.value_bool,
+                        FeatureValue.value_json,
+                    )
+                    .join(Feature, Feature.id == FeatureValue.feature_id)
+                    .where(
+                        and_(
+                            Feature.feature_set_id == feature_set_id,
+                            Feature.name.in_(feature_names),
+                            FeatureValue.entity_id.in_(
+                                entity_ids[start : start + batch_size]
+                            ),
+                        )
+                    )
+                )
+
+                if end_timestamp is not None:
+                    statement = statement.where(
+                        FeatureValue.event_timestamp <= end_timestamp
+                    )
+
+                rows = await session.execute(statement)
+                for name, entity_id, event_timestamp, *values in rows:
+                    # Same column precedence as FeatureValue.get_value
+                    columns["feature_name"].append(name)
+                    columns["entity_id"].append(entity_id)
+                    columns["event_timestamp"].append(event_timestamp)
+                    columns["value"].append(
+                        next((v for v in values if v is not None), None)
+                    )
+
+        # Keep raw Python values so ints do not widen to floats on merge
+        columns["value"] = pd.Series(columns["value"], dtype=object)
+        return pd.DataFrame(columns)
 
     async def get_feature_value_at_timestamp(
         self, feature_id: str, entity_id: str, timestamp: datetime
     ) -> any:
         """Get feature value at specific timestamp"""
-        db = next(get_db())
-        try:
+        async with AsyncSessionLocal() as session:
             # Get the most recent value before or at the timestamp
-            value_record = (
-                db.query(FeatureValue)
-                .filter(
+            result = await session.execute(
+                select(FeatureValue)
+                .where(
                     and_(
                         FeatureValue.feature_id == feature_id,
                         FeatureValue.entity_id == entity_id,
@@ -324,40 +811,155 @@ class FeatureStorage:
                     )
                 )
                 .order_by(desc(FeatureValue.event_timestamp))
-                .first()
+                .limit(1)
             )
+            value_record = result.scalars().first()
 
-            if value_record:
-                return value_record.get_value()
+        if value_record:
+            return value_record.get_value()
 
-            return None
+        return None
 
-        finally:
-            db.close()
+    async def materialize_incremental(
+        self, feature_set: FeatureSet, end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Materialize only source rows newer than the feature set's watermark
 
-    async def materialize_features(
+        The watermark is the latest materialized event timestamp. It advances
+        together with the feature set statistics once the delta is written,
+        and the delta file is named after the watermark it starts from, so a
+        retried run overwrites its own partial output instead of duplicating
+        rows.
+
+        Args:
+            feature_set: Feature set to materialize
+            end_date: Optional end date, defaults to now
+
+        Returns:
+            Materialization statistics
+        """
+        end_date = end_date or datetime.utcnow()
+        watermark = await self._read_watermark(feature_set)
+
+        start_date = (
+            watermark or feature_set.materialization_start_date or MATERIALIZATION_EPOCH
+        )
+
+        return await self.materialize_features(
+            feature_set, start_date, end_date, incremental=True, watermark=watermark
+        )
+
+    async def materialize_backfill(
         self, feature_set: FeatureSet, start_date: datetime, end_date: datetime
+    ) -> Dict[str, Any]:
+        """
+        Append history from before the range covered by incremental runs
+
+        Incremental runs cover source rows from the feature set's
+        materialization_start_date on, so a backfill must end by then; it
+        reads rows in [start_date, end_date) and leaves the watermark alone.
+        The output file is named after the window, so a retried backfill
+        replaces its own files until they are compacted. Backfills are
+        append-only: different windows must not overlap.
+
+        Raises:
+            ValueError: If the window is empty or overlaps incremental runs
+
+        Returns:
+            Materialization statistics
+        """
+        incremental_start = _naive_utc(feature_set.materialization_start_date)
+        start_date, end_date = _naive_utc(start_date), _naive_utc(end_date)
+
+        if start_date >= end_date:
+            raise ValueError("Backfill start_date must be before end_date")
+        if incremental_start is None:
+            raise ValueError(
+                "Backfills need a materialization_start_date; incremental runs "
+                "cover all source rows without one"
+            )
+        if end_date > incremental_start:
+            raise ValueError(
+                "Backfill must end by the materialization_start_date "
+                f"{incremental_start.isoformat()}; later rows are materialized "
+                "incrementally"
+            )
+
+        return await self.materialize_features(feature_set, start_date, end_date)
+
+    async def _read_watermark(self, feature_set: FeatureSet) -> Optional[datetime]:
+        """Read the committed watermark, cached definitions may be behind"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(FeatureSet.materialization_watermark).where(
+                    FeatureSet.id == feature_set.id
+                )
+            )
+            return result.scalar()
+
+    async def materialize_features(
+        self,
+        feature_set: FeatureSet,
+        start_date: datetime,
+        end_date: datetime,
+        incremental: bool = False,
+        watermark: Optional[datetime] = None,
     ) -> Dict[str, Any]:
         """
         Materialize features for a date range
 
+        The online store is only updated from incremental runs and windows
+        reaching the watermark; a backfill of an older window would otherwise
+        replace fresher online values with its latest rows.
+
         Args:
             feature_set: Feature set to materialize
             start_date: Start date for materialization
             end_date: End date for materialization
+            incremental: Whether to process rows newer than the watermark only
+                and advance it
+            watermark: Current watermark for incremental materialization
 
         Returns:
             Materialization statistics
         """
         try:
             logger.info(
-                f"Starting materialization for {feature_set.name} "
-                f"from {start_date} to {end_date}"
+                f"Starting {'incremental ' if incremental else ''}materialization "
+                f"for {feature_set.name} from {start_date} to {end_date}"
             )
 
             # Get source data based on feature set configuration
             source_data = await self._get_source_data(feature_set, start_date, end_date)
 
+            new_watermark = None
+            if (
+                not incremental
+                and not source_data.empty
+                and "event_timestamp" in source_data.columns
+            ):
+                # Windows are half-open, so adjacent windows share no rows
+                event_times = pd.to_datetime(
+                    source_data["event_timestamp"], utc=True
+                ).dt.tz_localize(None)
+                source_data = source_data[(event_times < end_date).to_numpy()]
+            if incremental and not source_data.empty:
+                if "event_timestamp" not in source_data.columns:
+                    raise ValueError(
+                        "Incremental materialization requires an event_timestamp "
+                        "column"
+                    )
+                event_times = pd.to_datetime(
+                    source_data["event_timestamp"], utc=True
+                ).dt.tz_localize(None)
+                if watermark is not None:
+                    newer = event_times > watermark
+                    source_data = source_data[newer.to_numpy()]
+                    event_times = event_times[newer]
+                if not source_data.empty:
+                    new_watermark = event_times.max().to_pydatetime()
+
             if source_data.empty:
                 logger.warning(f"No source data found for {feature_set.name}")
                 return {"rows_processed": 0, "status": "no_data"}
@@ -368,21 +970,46 @@ class FeatureStorage:
             )
 
             # Write to offline store
-            output_path = await self.write_feature_values(feature_set, transformed_data)
+            if incremental:
+                file_name = "incremental_" + (
+                    watermark.strftime("%Y%m%dT%H%M%S%f") if watermark else "initial"
+                )
+            else:
+                file_name = (
+                    f"backfill_{start_date:%Y%m%dT%H%M%S%f}_{end_date:%Y%m%dT%H%M%S%f}"
+                )
+            output_path = await self.write_feature_values(
+                feature_set,
+                transformed_data,
+                file_name=file_name,
+                watermark=new_watermark,
+            )
 
             # Update online store if enabled
-            if settings.ONLINE_STORE_ENABLED and feature_set.online_enabled:
-                await self._update_online_store(feature_set, transformed_data)
+            online_entities = 0
+            if (
+                settings.ONLINE_STORE_ENABLED
+                and feature_set.online_enabled
+                and (
+                    incremental or await self._reaches_watermark(feature_set, end_date)
+                )
+            ):
+                online_entities = await self._update_online_store(
+                    feature_set, transformed_data
+                )
 
             # Update feature set metadata
             stats = {
                 "rows_processed": len(transformed_data),
+                "online_entities": online_entities,
                 "status": "success",
                 "output_path": output_path,
                 "duration_seconds": 0,  # Would be calculated
                 "start_date": start_date.isoformat(),
                 "end_date": end_date.isoformat(),
             }
+            if incremental:
+                stats["watermark"] = new_watermark.isoformat()
 
             return stats
 
@@ -390,12 +1017,178 @@ class FeatureStorage:
             logger.error(f"Error materializing features: {e}")
             raise
 
-    async def _list_feature_set_files(self, feature_set: FeatureSet) -> List[str]:
-        """List all data files for a feature set"""
+    async def _reaches_watermark(
+        self, feature_set: FeatureSet, end_date: datetime
+    ) -> bool:
+        """Whether a materialization window ends at or after the watermark"""
+        watermark = await self._read_watermark(feature_set)
+        if watermark is None:
+            return True
+
+        end_date = _naive_utc(end_date)
+        if end_date < watermark:
+            logger.info(
+                f"Window ending {end_date} is behind the watermark of "
+                f"{feature_set.name} ({watermark}), online store not updated"
+            )
+            return False
+        return True
+
+    async def _list_feature_set_files(
+        self,
+        feature_set: FeatureSet,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> List[str]:
+        """
+        List data files for a feature set
+
+        Files come from the DuckDB catalog when available, so reads do not
+        list the store. Partitions outside the optional date range are
+        pruned; files written before partitioning was introduced are always
+        included.
+        """
+        if self.duckdb_pool is not None:
+            paths = await self._catalog_files(feature_set)
+        else:
+            paths = [
+                path for path, _ in await self._list_feature_set_objects(feature_set)
+            ]
+
+        return sorted(
+            path
+            for path in paths
+            if _partition_in_range(path, start_date=start_date, end_date=end_date)
+        )
+
+    async def _offline_source(
+        self,
+        feature_set: FeatureSet,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Optional[str]:
+        """
+        DuckDB source for a feature set's offline data
+
+        Unbounded reads use the feature set's catalog view; date-bounded
+        reads scan only the files of matching partitions.
+
+        Returns:
+            Source to select from, or None if the feature set has no data
+        """
+        data_files = await self._list_feature_set_files(
+            feature_set, start_date=start_date, end_date=end_date
+        )
+        if not data_files:
+            return None
+        if start_date is None and end_date is None:
+            return _quote_identifier(_catalog_view_name(feature_set.name))
+        return _parquet_source(data_files)
+
+    async def _catalog_files(self, feature_set: FeatureSet) -> List[str]:
+        """Data files of a feature set from the catalog, refreshed when stale"""
+        refreshed = await self.duckdb_pool.execute(
+            "SELECT refreshed_at FROM feature_set_catalog WHERE feature_set = ?",
+            [feature_set.name],
+        )
+
+        max_age = settings.DUCKDB_CATALOG_REFRESH_SECONDS
+        if not refreshed or (
+            (datetime.utcnow() - refreshed[0][0]).total_seconds() > max_age
+        ):
+            return [path for path, _ in await self.refresh_catalog(feature_set)]
+
+        return [
+            row[0]
+            for row in await self.duckdb_pool.execute(
+                "SELECT path FROM feature_set_files WHERE feature_set = ?",
+                [feature_set.name],
+            )
+        ]
+
+    async def refresh_catalog(self, feature_set: FeatureSet) -> List[Tuple[str, int]]:
+        """
+        Re-list a feature set's data files into the DuckDB catalog
+
+        Replaces the feature set's file entries and recreates its view over
+        all of its files. Called after compaction, and when the catalog is
+        older than DUCKDB_CATALOG_REFRESH_SECONDS (to pick up writes from
+        other instances); writes add their own files. Catalog changes of one
+        feature set are serialized, since concurrent catalog transactions
+        conflict.
+
+        Args:
+            feature_set: Feature set to refresh
+
+        Returns:
+            Listed data files with their sizes in bytes
+        """
+        async with self._catalog_lock(feature_set):
+            return await self._replace_catalog(feature_set)
+
+    async def _add_catalog_files(
+        self, feature_set: FeatureSet, objects: List[Tuple[str, int]]
+    ):
+        """
+        Add newly written data files to the DuckDB catalog
+
+        Avoids re-listing the store on every write. A feature set without
+        catalog entries yet is listed in full instead. The refresh time is
+        left alone so writes from other instances are still picked up.
+        """
+        if self.duckdb_pool is None:
+            return
+
+        async with self._catalog_lock(feature_set):
+            added = await self.duckdb_pool.run(
+                _insert_catalog_entries, feature_set.name, objects
+            )
+            if not added:
+                await self._replace_catalog(feature_set)
+
+    def _catalog_lock(self, feature_set: FeatureSet) -> asyncio.Lock:
+        """Lock serializing catalog changes of a feature set"""
+        return self._catalog_locks.setdefault(feature_set.name, asyncio.Lock())
+
+    async def _replace_catalog(self, feature_set: FeatureSet) -> List[Tuple[str, int]]:
+        """List a feature set's files into the catalog, holding its lock"""
+        objects = await self._list_feature_set_objects(feature_set)
+        if self.duckdb_pool is None:
+            return objects
+
+        await self.duckdb_pool.run(_replace_catalog_entries, feature_set.name, objects)
+        return objects
+
+    async def _list_feature_set_objects(
+        self, feature_set: FeatureSet
+    ) -> List[Tuple[str, int]]:
+        """List all data files for a feature set with their sizes in bytes"""
+        # Listing is blocking and grows with the file count
+        return await asyncio.to_thread(self._scan_feature_set_objects, feature_set.name)
+
+    def _scan_feature_set_objects(self, feature_set_name: str) -> List[Tuple[str, int]]:
+        """
+        List the live data files of a feature set in the store
+
+        Files replaced by a compacted file stay in the store for a grace
+        period but are left out once the compacted file exists.
+        """
+        files = self._scan_data_files(feature_set_name)
+        live = {path for path, _ in files}
+        replaced = {
+            path
+            for _, manifest in self._scan_compaction_manifests(feature_set_name)
+            if manifest["compacted"] in live
+            for path in manifest["replaced"]
+        }
+        return [(path, size) for path, size in files if path not in replaced]
+
+    def _scan_data_files(self, feature_set_name: str) -> List[Tuple[str, int]]:
+        """List all data files of a feature set in the store"""
         files = []
 
         if settings.STORAGE_BACKEND == "s3":
-            prefix = f"feature_sets/{feature_set.name}/data/"
+            prefix = f"feature_sets/{feature_set_name}/data/"
 
             paginator = self.s3_client.get_paginator("list_objects_v2")
             pages = paginator.paginate(Bucket=settings.S3_BUCKET, Prefix=prefix)
@@ -404,31 +1197,384 @@ class FeatureStorage:
                 if "Contents" in page:
                     for obj in page["Contents"]:
                         if obj["Key"].endswith(".parquet"):
-                            files.append(f"s3://{settings.S3_BUCKET}/{obj['Key']}")
+                            files.append(
+                                (
+                                    f"s3://{settings.S3_BUCKET}/{obj['Key']}",
+                                    obj["Size"],
+                                )
+                            )
 
         else:
             # Local file system
             import os
 
             data_dir = (
-                f"{settings.STORAGE_PATH}/feature_sets/" f"{feature_set.name}/data/"
+                f"{settings.STORAGE_PATH}/feature_sets/" f"{feature_set_name}/data/"
             )
-            if os.path.exists(data_dir):
-                for file in os.listdir(data_dir):
+            for root, _, file_names in os.walk(data_dir):
+                for file in file_names:
                     if file.endswith(".parquet"):
-                        files.append(os.path.join(data_dir, file))
+                        path = os.path.join(root, file)
+                        files.append((path, os.path.getsize(path)))
 
         return files
 
-    async def _update_feature_set_stats(self, feature_set: FeatureSet, row_count: int):
-        """Update feature set statistics"""
-        db = next(get_db())
+    def _scan_compaction_manifests(
+        self, feature_set_name: str
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Load the compaction manifests of a feature set with their paths"""
+        manifests = []
+
+        if settings.STORAGE_BACKEND == "s3":
+            prefix = f"feature_sets/{feature_set_name}/compaction/"
+
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            pages = paginator.paginate(Bucket=settings.S3_BUCKET, Prefix=prefix)
+
+            for page in pages:
+                for obj in page.get("Contents", []):
+                    if obj["Key"].endswith(".json"):
+                        response = self.s3_client.get_object(
+                            Bucket=settings.S3_BUCKET, Key=obj["Key"]
+                        )
+                        manifests.append(
+                            (
+                                f"s3://{settings.S3_BUCKET}/{obj['Key']}",
+                                json.loads(response["Body"].read()),
+                            )
+                        )
+
+        else:
+            import os
+
+            manifest_dir = (
+                f"{settings.STORAGE_PATH}/feature_sets/"
+                f"{feature_set_name}/compaction"
+            )
+            if os.path.isdir(manifest_dir):
+                for file in os.listdir(manifest_dir):
+                    if file.endswith(".json"):
+                        path = os.path.join(manifest_dir, file)
+                        with open(path) as f:
+                            manifests.append((path, json.load(f)))
+
+        return manifests
+
+    def _write_compaction_manifest(self, path: str, manifest: Dict[str, Any]) -> str:
+        """Write a compaction manifest relative to the storage root"""
+        body = json.dumps(manifest).encode()
+
+        if settings.STORAGE_BACKEND == "s3":
+            self.s3_client.put_object(Bucket=settings.S3_BUCKET, Key=path, Body=body)
+            return f"s3://{settings.S3_BUCKET}/{path}"
+
+        import os
+
+        local_path = f"{settings.STORAGE_PATH}/{path}"
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        temp_path = f"{local_path}.{uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(body)
+        os.replace(temp_path, local_path)
+        return local_path
+
+    def _sweep_replaced_files(self, feature_set_name: str) -> int:
+        """
+        Delete files replaced by compaction once their grace period is over
+
+        Manifests whose compacted file is missing belong to failed runs and
+        are dropped without touching the files they list.
+
+        Returns:
+            Number of deleted data files
+        """
+        cutoff = datetime.utcnow() - timedelta(
+            seconds=settings.COMPACTION_DELETE_GRACE_SECONDS
+        )
+        live = None
+        deleted = 0
+
+        for path, manifest in self._scan_compaction_manifests(feature_set_name):
+            if datetime.fromisoformat(manifest["created_at"]) > cutoff:
+                continue
+
+            if live is None:
+                live = {path for path, _ in self._scan_data_files(feature_set_name)}
+            if manifest["compacted"] in live:
+                self._delete_files(manifest["replaced"])
+                deleted += len(manifest["replaced"])
+            self._delete_files([path])
+
+        return deleted
+
+    async def compact_feature_set(self, feature_set: FeatureSet) -> Dict[str, Any]:
+        """
+        Compact small offline files of a feature set
+
+        Small files within each partition are merged into one file sorted by
+        entity_id and event_timestamp, with row groups of
+        COMPACTION_ROW_GROUP_SIZE rows. Compacted files are published
+        atomically (S3 PUT, or a temporary file renamed into place) after a
+        manifest naming the files they replace, so listings never return a
+        row twice; if the catalog swap fails the compacted files are removed
+        again. Replaced files are kept for COMPACTION_DELETE_GRACE_SECONDS,
+        for queries and other instances' catalogs still reading them, and
+        deleted by the first compaction run after that. Today's partition is
+        left alone since it is still being written to.
+
+        Only one instance compacts a feature set at a time; a run that cannot
+        take the feature set's compaction lease is skipped.
+
+        Returns:
+            Compaction statistics
+        """
+        lock = self._compaction_locks.setdefault(feature_set.name, asyncio.Lock())
+
+        async with lock, self._compaction_lease(feature_set) as leased:
+            if not leased:
+                logger.info(
+                    f"Compaction of {feature_set.name} is running on another "
+                    "instance, skipping"
+                )
+                return {"feature_set": feature_set.name, "status": "skipped"}
+
+            return await self._compact_feature_set(feature_set)
+
+    @asynccontextmanager
+    async def _compaction_lease(self, feature_set: FeatureSet):
+        """
+        Hold the cluster-wide compaction lease of a feature set
+
+        The lease is a transaction-scoped Postgres advisory lock, held on a
+        dedicated connection for the whole run and released when the
+        transaction ends, even if this instance dies.
+
+        Yields:
+            Whether the lease was acquired
+        """
+        async with async_engine.begin() as conn:
+            result = await conn.execute(
+                text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"),
+                {"key": f"feature_store.compaction.{feature_set.name}"},
+            )
+            yield bool(result.scalar())
+
+    async def _compact_feature_set(self, feature_set: FeatureSet) -> Dict[str, Any]:
+        """Compact a feature set, holding its compaction lock and lease"""
+        deleted = await asyncio.to_thread(self._sweep_replaced_files, feature_set.name)
+        if deleted:
+            logger.info(f"Deleted {deleted} replaced files of {feature_set.name}")
+
+        today = f"{PARTITION_COLUMN}={datetime.utcnow():%Y-%m-%d}"
+
+        small_files: Dict[str, List[Tuple[str, int]]] = {}
+        for path, size in await self._list_feature_set_objects(feature_set):
+            directory, _ = path.rsplit("/", 1)
+            if size < settings.COMPACTION_SMALL_FILE_BYTES and not (
+                directory.endswith(today)
+            ):
+                small_files.setdefault(directory, []).append((path, size))
+
+        stats = {
+            "feature_set": feature_set.name,
+            "status": "success",
+            "partitions_compacted": 0,
+            "files_removed": 0,
+            "rows": 0,
+        }
+
+        replaced = []
+        compacted = []
         try:
-            feature_set.last_materialization = datetime.utcnow()
-            feature_set.row_count = (feature_set.row_count or 0) + row_count
-            db.commit()
-        finally:
-            db.close()
+            for directory, files in sorted(small_files.items()):
+                if len(files) < settings.COMPACTION_MIN_FILES:
+                    continue
+
+                # Bound the input of each merge so a large backlog of small
+                # files yields several compacted files
+                chunks = [
+                    paths
+                    for paths in _size_chunks(
+                        sorted(files), settings.COMPACTION_TARGET_FILE_BYTES
+                    )
+                    if len(paths) > 1
+                ]
+                for paths in chunks:
+                    compacted_path, rows = await self.duckdb_pool.run(
+                        self._compact_files, feature_set.name, directory, paths
+                    )
+                    compacted.append(compacted_path)
+                    replaced.extend(paths)
+                    stats["files_removed"] += len(paths)
+                    stats["rows"] += rows
+                if chunks:
+                    stats["partitions_compacted"] += 1
+
+            if replaced:
+                await self.refresh_catalog(feature_set)
+
+        except Exception:
+            # The catalog still lists the original files, keep them as the
+            # only copy of their rows. Manifests without a compacted file are
+            # ignored and swept later.
+            if compacted:
+                await asyncio.to_thread(self._delete_files, compacted)
+            raise
+
+        logger.info(
+            f"Compacted {stats['files_removed']} files in "
+            f"{stats['partitions_compacted']} partitions of {feature_set.name}"
+        )
+        return stats
+
+    def _compact_files(
+        self,
+        cursor: duckdb.DuckDBPyConnection,
+        feature_set_name: str,
+        directory: str,
+        paths: List[str],
+    ) -> Tuple[str, int]:
+        """
+        Merge parquet files of one directory into a single sorted file
+
+        The sorted rows are streamed from DuckDB into the parquet writer one
+        row group at a time; DuckDB spills the sort to disk when needed. The
+        manifest is written first, so the replaced files are hidden from
+        listings as soon as the compacted file appears.
+
+        Returns:
+            Path of the compacted file and its row count
+        """
+        source = _parquet_source(paths)
+        columns = [
+            row[0]
+            for row in cursor.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()
+            # Drop pandas index columns written by older versions
+            if not row[0].startswith("__index_level_")
+        ]
+        sort_keys = [
+            _quote_identifier(name)
+            for name in ("entity_id", "event_timestamp")
+            if name in columns
+        ]
+        query = (
+            f"SELECT {', '.join(_quote_identifier(name) for name in columns)} "
+            f"FROM {source}"
+        )
+        if sort_keys:
+            query += f" ORDER BY {', '.join(sort_keys)}"
+
+        # Row counts come from the parquet footers
+        (rows,) = cursor.execute(f"SELECT count(*) FROM {source}").fetchone()
+
+        root = (
+            f"s3://{settings.S3_BUCKET}"
+            if settings.STORAGE_BACKEND == "s3"
+            else settings.STORAGE_PATH
+        )
+        created_at = datetime.utcnow()
+        file_stem = f"compacted_{created_at:%Y%m%d_%H%M%S_%f}"
+        relative_path = f"{directory[len(root) + 1:]}/{file_stem}.parquet"
+        self._write_compaction_manifest(
+            f"feature_sets/{feature_set_name}/compaction/{file_stem}.json",
+            {
+                "compacted": f"{root}/{relative_path}",
+                "replaced": paths,
+                "created_at": created_at.isoformat(),
+            },
+        )
+
+        reader = cursor.execute(query).fetch_record_batch(
+            settings.COMPACTION_ROW_GROUP_SIZE
+        )
+        compacted_path, _ = self._write_parquet(
+            relative_path,
+            reader,
+            row_group_size=settings.COMPACTION_ROW_GROUP_SIZE,
+        )
+
+        return compacted_path, rows
+
+    def _delete_files(self, paths: List[str]):
+        """Delete files given by full path"""
+        if settings.STORAGE_BACKEND == "s3":
+            prefix = f"s3://{settings.S3_BUCKET}/"
+            keys = [{"Key": path[len(prefix) :]} for path in paths]
+            for start in range(0, len(keys), 1000):
+                self.s3_client.delete_objects(
+                    Bucket=settings.S3_BUCKET,
+                    Delete={"Objects": keys[start : start + 1000], "Quiet": True},
+                )
+        else:
+            import os
+
+            for path in paths:
+                # Already gone if an earlier sweep was interrupted
+                if os.path.exists(path):
+                    os.remove(path)
+
+    async def run_compaction_job(self):
+        """Periodically compact the offline store of every feature set"""
+        while True:
+            await asyncio.sleep(settings.COMPACTION_INTERVAL_SECONDS)
+
+            try:
+                async with AsyncSessionLocal() as session:
+                    result = await session.execute(
+                        select(FeatureSet).where(FeatureSet.offline_enabled.is_(True))
+                    )
+                    feature_sets = result.scalars().all()
+
+                for feature_set in feature_sets:
+                    await self.compact_feature_set(feature_set)
+
+            except Exception as e:
+                logger.error(f"Error in offline compaction job: {e}")
+
+    async def _update_feature_set_stats(
+        self,
+        feature_set: FeatureSet,
+        row_count: int,
+        watermark: Optional[datetime] = None,
+    ):
+        """
+        Update feature set statistics
+
+        When a watermark is given it is advanced in the same statement, and
+        only if it moves forward, so a concurrent or replayed run cannot move
+        it back or count its rows twice.
+        """
+        materialized_at = datetime.utcnow()
+
+        statement = update(FeatureSet).where(FeatureSet.id == feature_set.id)
+        values = {
+            "last_materialization": materialized_at,
+            "row_count": func.coalesce(FeatureSet.row_count, 0) + row_count,
+        }
+        if watermark is not None:
+            statement = statement.where(
+                or_(
+                    FeatureSet.materialization_watermark.is_(None),
+                    FeatureSet.materialization_watermark < watermark,
+                )
+            )
+            values["materialization_watermark"] = watermark
+
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(statement.values(**values))
+            await session.commit()
+
+        if result.rowcount == 0:
+            logger.warning(
+                f"Materialization watermark of {feature_set.name} is already at "
+                f"or past {watermark}, statistics not updated"
+            )
+            return
+
+        feature_set.last_materialization = materialized_at
+        feature_set.row_count = (feature_set.row_count or 0) + row_count
+        if watermark is not None:
+            feature_set.materialization_watermark = watermark
 
     async def _get_source_data(
         self, feature_set: FeatureSet, start_date: datetime, end_date: datetime
@@ -446,7 +1592,379 @@ class FeatureStorage:
         # For now, return source data as-is
         return source_data
 
-    async def _update_online_store(self, feature_set: FeatureSet, data: pd.DataFrame):
-        """Update online store with latest feature values"""
-        # This would update Redis or other online store
-        # Implementation depends on online store backend
+    async def _update_online_store(
+        self, feature_set: FeatureSet, data: pd.DataFrame
+    ) -> int:
+        """
+        Update online store with latest feature values
+
+        Keeps the latest row per entity and writes it in pipelined batches of
+        MATERIALIZATION_BATCH_SIZE entities, expiring after the feature set's
+        online TTL.
+
+        Returns:
+            Number of entities written
+        """
+        if self.online_store is None or data.empty:
+            return 0
+
+        entity_column = "entity_id" if "entity_id" in data.columns else "id"
+        if entity_column not in data.columns:
+            logger.warning(
+                f"No entity column in materialized data for {feature_set.name}, "
+                "skipping online store update"
+            )
+            return 0
+
+        feature_columns = [c for c in data.columns if c not in ONLINE_RESERVED_COLUMNS]
+        if not feature_columns:
+            return 0
+
+        # Latest row per entity
+        key_columns = [entity_column]
+        if "entity_type" in data.columns:
+            key_columns.insert(0, "entity_type")
+        if "event_timestamp" in data.columns:
+            data = data.sort_values("event_timestamp", kind="stable")
+        latest = data.drop_duplicates(subset=key_columns, keep="last")
+
+        default_entity_type = (feature_set.entities or ["entity"])[0]
+        ttl = (
+            feature_set.ttl_online_hours * 3600
+            if feature_set.ttl_online_hours
+            else None
+        )
+
+        records = latest[key_columns + feature_columns].to_dict("records")
+        batch_size = settings.MATERIALIZATION_BATCH_SIZE
+
+        for start in range(0, len(records), batch_size):
+            batch = {}
+            for record in records[start : start + batch_size]:
+                entity_type = record.get("entity_type", default_entity_type)
+                key = (str(entity_type), str(record[entity_column]), feature_set.name)
+                batch[key] = {
+                    name: record[name]
+                    for name in feature_columns
+                    if not is_missing(record[name])
+                }
+            await self.online_store.set_many(batch, ttl=ttl)
+
+        logger.info(
+            f"Materialized {len(records)} entities of {feature_set.name} "
+            "to the online store"
+        )
+        return len(records)
+
+
+def _partition_by_event_date(data: pd.DataFrame):
+    """
+    Split rows into Hive-style event date partitions
+
+    Yields (partition, rows) pairs; data without an event_timestamp column is
+    yielded whole with an empty partition, and rows with a null timestamp go
+    to the NULL_PARTITION partition.
+    """
+    if "event_timestamp" not in data.columns:
+        yield "", data
+        return
+
+    event_dates = (
+        pd.to_datetime(data["event_timestamp"], utc=True)
+        .dt.strftime("%Y-%m-%d")
+        .fillna(NULL_PARTITION)
+    )
+    for event_date, rows in data.groupby(event_dates.to_numpy(), sort=True):
+        yield f"{PARTITION_COLUMN}={event_date}", rows
+
+
+def _partition_in_range(
+    path: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> bool:
+    """
+    Whether a data file's event date partition overlaps a date range
+
+    Unpartitioned files and the null timestamp partition are always in range;
+    queries filter their rows by event_timestamp.
+    """
+    partition_date = _partition_date(path)
+    if partition_date is None or partition_date == NULL_PARTITION:
+        return True
+
+    if start_date and partition_date < _utc_date(start_date):
+        return False
+    if end_date and partition_date > _utc_date(end_date):
+        return False
+    return True
+
+
+def _partition_date(path: str) -> Optional[str]:
+    """Event date partition of a data file, None for unpartitioned files"""
+    marker = f"/{PARTITION_COLUMN}="
+    if marker not in path:
+        return None
+    return path.split(marker, 1)[1].split("/", 1)[0]
+
+
+def _catalog_view_name(feature_set_name: str) -> str:
+    """Name of a feature set's view in the DuckDB catalog"""
+    return f"feature_set__{feature_set_name}"
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC datetime from a naive (assumed UTC) or aware datetime"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _utc_date(value: datetime) -> str:
+    """UTC date of a naive (assumed UTC) or aware datetime as YYYY-MM-DD"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d")
+
+
+def _parquet_source(paths: List[str]) -> str:
+    """
+    DuckDB table function reading the given data files
+
+    Partition values are already encoded in event_timestamp, so DuckDB's
+    Hive partition detection is turned off to keep the schema stable.
+    """
+    return (
+        f"read_parquet({_sql_string_list(paths)}, "
+        "union_by_name=true, hive_partitioning=false)"
+    )
+
+
+def _size_chunks(files: List[Tuple[str, int]], limit: int) -> List[List[str]]:
+    """Group (path, size) pairs in order into chunks of at most limit bytes"""
+    chunks: List[List[str]] = []
+    chunk_bytes = 0
+    for path, size in files:
+        if not chunks or chunk_bytes + size > limit:
+            chunks.append([])
+            chunk_bytes = 0
+        chunks[-1].append(path)
+        chunk_bytes += size
+    return chunks
+
+
+@contextmanager
+def _entity_relation(
+    conn: duckdb.DuckDBPyConnection,
+    entity_ids: Optional[List[str]],
+    name: Optional[str] = None,
+):
+    """
+    Register entity IDs as a temporary DuckDB relation
+
+    Yields the relation name, or None when there is nothing to filter on.
+    """
+    if not entity_ids:
+        yield None
+        return
+
+    relation_name = name or f"entity_ids_{uuid4().hex}"
+    conn.register(
+        relation_name,
+        pa.table({"entity_id": pa.array([str(eid) for eid in entity_ids])}),
+    )
+    try:
+        yield relation_name
+    finally:
+        conn.unregister(relation_name)
+
+
+def _fetch_df(
+    cursor: duckdb.DuckDBPyConnection,
+    query: str,
+    params: List[Any],
+    entity_ids: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Run a feature values query, registering its entity filter first"""
+    with _entity_relation(cursor, entity_ids, name=ENTITY_RELATION):
+        return cursor.execute(query, params).df()
+
+
+def _fetch_arrow(
+    cursor: duckdb.DuckDBPyConnection,
+    query: str,
+    relation_name: str,
+    relation: pd.DataFrame,
+) -> pa.Table:
+    """Run a query against a temporarily registered relation"""
+    cursor.register(relation_name, relation)
+    try:
+        return cursor.execute(query).arrow()
+    finally:
+        cursor.unregister(relation_name)
+
+
+def _replace_catalog_entries(
+    cursor: duckdb.DuckDBPyConnection,
+    feature_set_name: str,
+    objects: List[Tuple[str, int]],
+):
+    """Replace a feature set's catalog files and view in one transaction"""
+    paths = [path for path, _ in objects]
+    relation_name = "catalog_files"
+
+    cursor.register(relation_name, _catalog_files_table(feature_set_name, objects))
+    try:
+        cursor.execute("BEGIN TRANSACTION")
+        try:
+            cursor.execute(
+                "DELETE FROM feature_set_files WHERE feature_set = ?",
+                [feature_set_name],
+            )
+            cursor.execute(
+                f"INSERT INTO feature_set_files SELECT * FROM {relation_name}"
+            )
+            cursor.execute(
+                "INSERT OR REPLACE INTO feature_set_catalog VALUES (?, ?)",
+                [feature_set_name, datetime.utcnow()],
+            )
+            _create_catalog_view(cursor, feature_set_name, paths)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        cursor.unregister(relation_name)
+
+
+def _insert_catalog_entries(
+    cursor: duckdb.DuckDBPyConnection,
+    feature_set_name: str,
+    objects: List[Tuple[str, int]],
+) -> bool:
+    """
+    Add files to a feature set's catalog and view in one transaction
+
+    Returns:
+        False, without changes, if the feature set has no catalog entries yet
+    """
+    relation_name = "catalog_files"
+
+    cursor.register(relation_name, _catalog_files_table(feature_set_name, objects))
+    try:
+        cursor.execute("BEGIN TRANSACTION")
+        try:
+            cataloged = cursor.execute(
+                "SELECT 1 FROM feature_set_catalog WHERE feature_set = ?",
+                [feature_set_name],
+            ).fetchall()
+            if not cataloged:
+                cursor.execute("ROLLBACK")
+                return False
+
+            # Rewritten files replace their entries
+            cursor.execute(
+                "DELETE FROM feature_set_files WHERE feature_set = ? "
+                f"AND path IN (SELECT path FROM {relation_name})",
+                [feature_set_name],
+            )
+            cursor.execute(
+                f"INSERT INTO feature_set_files SELECT * FROM {relation_name}"
+            )
+            paths = cursor.execute(
+                "SELECT path FROM feature_set_files WHERE feature_set = ? "
+                "ORDER BY path",
+                [feature_set_name],
+            ).fetchall()
+            _create_catalog_view(cursor, feature_set_name, [row[0] for row in paths])
+            cursor.execute("COMMIT")
+            return True
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        cursor.unregister(relation_name)
+
+
+def _catalog_files_table(
+    feature_set_name: str, objects: List[Tuple[str, int]]
+) -> pa.Table:
+    """Catalog file entries of a feature set as an Arrow table"""
+    paths = [path for path, _ in objects]
+    return pa.table(
+        {
+            "feature_set": pa.array([feature_set_name] * len(objects), pa.string()),
+            "path": pa.array(paths, pa.string()),
+            "event_date": pa.array([_partition_date(p) for p in paths], pa.string()),
+            "size_bytes": pa.array([size for _, size in objects], pa.int64()),
+        }
+    )
+
+
+def _create_catalog_view(
+    cursor: duckdb.DuckDBPyConnection, feature_set_name: str, paths: List[str]
+):
+    """Point a feature set's catalog view at its files, dropping it if none"""
+    view = _quote_identifier(_catalog_view_name(feature_set_name))
+    if paths:
+        cursor.execute(
+            f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM {_parquet_source(paths)}"
+        )
+    else:
+        cursor.execute(f"DROP VIEW IF EXISTS {view}")
+
+
+def _feature_values_query(
+    source: str,
+    features: Optional[List[str]] = None,
+    entity_relation: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Tuple[str, List[Any]]:
+    """
+    Build a parameterized DuckDB query over offline feature values
+
+    The source is a feature set view or a read_parquet call over data files.
+
+    Only the requested columns are selected so DuckDB reads just those
+    parquet columns, and entity filtering is a semi-join against a registered
+    relation rather than one predicate per entity.
+
+    Returns:
+        Query and its positional parameters
+    """
+    columns = "*"
+    if features:
+        columns = ", ".join(
+            _quote_identifier(name)
+            for name in ["entity_id", "event_timestamp"] + list(features)
+        )
+
+    query = f"SELECT {columns} FROM {source}"
+    if entity_relation:
+        query += f" SEMI JOIN {entity_relation} USING (entity_id)"
+
+    filters = []
+    params = []
+    if start_date:
+        filters.append("event_timestamp >= ?")
+        params.append(start_date)
+
+    if end_date:
+        filters.append("event_timestamp <= ?")
+        params.append(end_date)
+
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+
+    return query, params
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a column name for use in a DuckDB query"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_string_list(values: List[str]) -> str:
+    """Render strings as a DuckDB list literal"""
+    return "[" + ", ".join("'" + v.replace("'", "''") + "'" for v in values) + "]"